@@ -0,0 +1,176 @@
+"""
+planar arrangement of a solution.
+the segments are split at their intersection points into edges and the
+edges are stored as a doubly connected edge list (dcel) in flat integer
+arrays:
+    - vertices: the intersection points, with the ids of the solution
+      (points_ids, removed points being left as unused nan vertices),
+      followed by the endpoints which are not intersections;
+    - half edges: edge e is the pair of half edges 2e (oriented as in the
+      first segment containing it) and 2e + 1, so twin(h) = h ^ 1;
+    - next and prev follow the boundary of the face on the left of each
+      half edge (counterclockwise around bounded faces).
+overlapping (collinear) segments are split at the endpoints of each other
+and share their common edges.
+"""
+from itertools import chain
+from math import nan
+import numpy as np
+from geo.segment import CONTAINS_LIMIT
+from segment_index import SegmentIndex
+
+class Arrangement:
+    """
+    dcel of the segments of a solution.
+
+    attributes (numpy arrays):
+        vertices: coordinates of the vertices (one row per vertex)
+        origin: origin vertex of each half edge
+        twin, next, prev: twin, next and previous half edges of each half
+            edge
+        edge_segment: index of the first segment containing each edge
+        segment_offsets, segment_half_edges: the half edges of segment i,
+            ordered (and oriented) from its first endpoint to its second,
+            are segment_half_edges[segment_offsets[i]:segment_offsets[i+1]]
+    """
+    def __init__(self, vertices, origin, edge_segment, segment_offsets, segment_half_edges):
+        self.vertices = vertices
+        self.origin = origin
+        self.edge_segment = edge_segment
+        self.segment_offsets = segment_offsets
+        self.segment_half_edges = segment_half_edges
+        half_edges = np.arange(len(origin), dtype=np.int64)
+        self.twin = half_edges ^ 1
+        self.next = _next_half_edges(vertices, origin, self.twin)
+        self.prev = np.empty_like(self.next)
+        self.prev[self.next] = half_edges
+
+    def __len__(self):
+        """
+        returns the number of half edges.
+        """
+        return len(self.origin)
+
+    def target(self, half_edge):
+        """
+        returns the vertex at the end of the half edge.
+        """
+        return self.origin[half_edge ^ 1]
+
+    def half_edges(self, index):
+        """
+        returns the half edges of the segment of given index, ordered along
+        it.
+        """
+        return self.segment_half_edges[self.segment_offsets[index]:
+                                       self.segment_offsets[index + 1]]
+
+def build_arrangement(solution):
+    """
+    returns the arrangement of the segments of the solution and of their
+    intersection points.
+    segments are numbered in the order of solution.segments().
+    """
+    # Numbering the vertices: intersections keep their ids
+    ids = dict(solution.points_ids)
+    vertices = [(nan, nan) if point is None else point.coordinates
+                for point in solution.points_table]
+    members_segments, members_vertices = [], []
+    starts, directions = [], []
+    segments = list(solution.segments())
+    overlaps = _overlapping_endpoints(segments)
+    for index, segment in enumerate(segments):
+        for point in chain(segment.endpoints, solution.points(segment),
+                           overlaps.get(index, ())):
+            vertex = ids.get(point)
+            if vertex is None:
+                vertex = ids[point] = len(vertices)
+                vertices.append(point.coordinates)
+            members_segments.append(index)
+            members_vertices.append(vertex)
+        (x_1, y_1), (x_2, y_2) = (point.coordinates for point in segment.endpoints)
+        starts.append((x_1, y_1))
+        directions.append((x_2 - x_1, y_2 - y_1))
+    segments_count = len(starts)
+    vertices = np.array(vertices, dtype=np.float64).reshape(-1, 2)
+    members_segments = np.array(members_segments, dtype=np.int64)
+    members_vertices = np.array(members_vertices, dtype=np.int64)
+    starts = np.array(starts, dtype=np.float64).reshape(-1, 2)
+    directions = np.array(directions, dtype=np.float64).reshape(-1, 2)
+
+    # Ordering the vertices along their segments
+    positions = np.einsum("ij,ij->i", vertices[members_vertices] - starts[members_segments],
+                          directions[members_segments])
+    order = np.lexsort((positions, members_segments))
+    members_segments, members_vertices = members_segments[order], members_vertices[order]
+
+    # Consecutive distinct vertices of a segment give its sub edges
+    consecutive = (members_segments[1:] == members_segments[:-1]) & \
+        (members_vertices[1:] != members_vertices[:-1])
+    sub_segments = members_segments[:-1][consecutive]
+    sub_origins = members_vertices[:-1][consecutive]
+    sub_targets = members_vertices[1:][consecutive]
+
+    # Merging the sub edges of overlapping segments, edges being numbered
+    # by first appearance
+    keys = np.minimum(sub_origins, sub_targets) * len(vertices) + \
+        np.maximum(sub_origins, sub_targets)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    ranks = np.empty(len(first), dtype=np.int64)
+    ranks[np.argsort(first)] = np.arange(len(first))
+    first = np.sort(first)
+    origin = np.empty(2 * len(first), dtype=np.int64)
+    origin[0::2], origin[1::2] = sub_origins[first], sub_targets[first]
+    edges = ranks[inverse.reshape(-1)]
+    segment_half_edges = 2 * edges + (sub_origins != origin[2 * edges])
+    segment_offsets = np.zeros(segments_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sub_segments, minlength=segments_count), out=segment_offsets[1:])
+    return Arrangement(vertices, origin, sub_segments[first], segment_offsets,
+                       segment_half_edges)
+
+def _overlapping_endpoints(segments):
+    """
+    returns for the index of each segment the endpoints of the parallel
+    segments lying inside it (they are not intersections).
+    """
+    overlaps = {}
+    if not segments:
+        return overlaps
+    index = SegmentIndex(segments)
+    x_1, y_1, x_2, y_2 = index.coordinates.T
+    lengths = np.hypot(x_2 - x_1, y_2 - y_1)
+    margin = index.margin
+    for segment in segments:
+        for point in segment.endpoints:
+            x, y = point.coordinates
+            candidates = index.candidates((x - margin, y - margin, x + margin, y + margin))
+            # Points accepted by Segment.contains (twice the tolerance for
+            # the rounding errors)
+            distances = np.hypot(x_1[candidates] - x, y_1[candidates] - y) + \
+                np.hypot(x_2[candidates] - x, y_2[candidates] - y)
+            near = candidates[distances - lengths[candidates] < 2 * CONTAINS_LIMIT]
+            for position in near.tolist():
+                other = segments[position]
+                if point not in other.endpoints and other.contains(point) and \
+                   other.line_intersection_with(segment) is None:
+                    overlaps.setdefault(position, []).append(point)
+    return overlaps
+
+def _next_half_edges(vertices, origin, twin):
+    """
+    returns the next half edge of each half edge: the first one clockwise
+    after its twin around its target.
+    """
+    if not len(origin):
+        return np.empty(0, dtype=np.int64)
+    vectors = vertices[origin[twin]] - vertices[origin]
+    angles = np.arctan2(vectors[:, 1], vectors[:, 0])
+    # Half edges counterclockwise around each vertex
+    around = np.lexsort((angles, origin))
+    origins = origin[around]
+    group_starts = np.flatnonzero(np.r_[True, origins[1:] != origins[:-1]])
+    group_ends = np.r_[group_starts[1:], len(around)] - 1
+    clockwise = np.empty_like(around)
+    clockwise[around[1:]] = around[:-1]
+    clockwise[around[group_starts]] = around[group_ends]
+    return clockwise[twin]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+runs an intersection engine on many .bo files.
+files are processed concurrently, each one in its own process (killed if
+it runs longer than the timeout), and one json line is printed per file:
+    {"file": ..., "status": "ok", "segments": ..., "intersections": ...,
+     "wall_time": ..., "peak_memory": ...}
+status is "timeout" or "error" (with an "error" message) on failure.
+peak memory is the maximum resident set size of the process, in bytes.
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+from multiprocessing.connection import wait
+from time import perf_counter
+from geo.segment import Segment
+from geo.bo_file import load_segments
+from geo.coordinates_hash import GridHash
+from solution import Solution
+from bo import ENGINES
+
+def run_file(filename, engine="sweep", exact=False, grid=False):
+    """
+    computes the intersections of a .bo file.
+    returns the statistics of the run.
+    """
+    start = perf_counter()
+    adjuster, segments = load_segments(filename, GridHash() if grid else None)
+    Segment.adjuster, Segment.exact = adjuster, exact
+    solution = Solution(segments)
+    ENGINES[engine](segments, solution)
+    intersections = solution.intersections_count()
+    wall_time = perf_counter() - start
+    return {
+        "file": filename,
+        "status": "ok",
+        "segments": len(segments),
+        "intersections": intersections,
+        "wall_time": wall_time,
+        # kilobytes on linux
+        "peak_memory": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+def _run_file(connection, filename, options):
+    """
+    runs the file in a worker process, sending back its statistics.
+    """
+    try:
+        result = run_file(filename, **options)
+    except Exception as error:  #pylint: disable=broad-except
+        result = {"file": filename, "status": "error", "error": repr(error)}
+    connection.send(result)
+    connection.close()
+
+def run_batch(filenames, workers=None, timeout=None, **options):
+    """
+    runs the files with at most workers processes at once (the number of
+    cpus by default), killing the ones running longer than timeout
+    seconds.
+    iterates on the statistics of the files, as they are finished.
+    options are given to run_file.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    pending = list(reversed(filenames))
+    # running processes by their result connection
+    running = dict()
+    while pending or running:
+        while pending and len(running) < workers:
+            filename = pending.pop()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_run_file,
+                                              args=(sender, filename, options))
+            process.start()
+            sender.close()
+            running[receiver] = (process, filename, perf_counter())
+
+        # waiting for a result or for the next timeout
+        delay = None
+        if timeout is not None:
+            delay = max(0.0, min(started + timeout for _, _, started in running.values())
+                        - perf_counter())
+        for receiver in wait(list(running), delay):
+            process, filename, started = running.pop(receiver)
+            try:
+                result = receiver.recv()
+            except EOFError:
+                result = {"file": filename, "status": "error",
+                          "error": "exit code {}".format(process.exitcode)}
+            process.join()
+            receiver.close()
+            yield result
+
+        if timeout is not None:
+            now = perf_counter()
+            for receiver, (process, filename, started) in list(running.items()):
+                if now - started >= timeout:
+                    process.kill()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    yield {"file": filename, "status": "timeout", "wall_time": now - started}
+
+def main():
+    """
+    runs the files given on the command line.
+    """
+    parser = argparse.ArgumentParser(description="intersections of many .bo files")
+    parser.add_argument("files", nargs="*", help=".bo files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: number of cpus)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="maximum time per file in seconds")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="sweep",
+                        help="intersection engine (default: sweep)")
+    parser.add_argument("--exact", action="store_true",
+                        help="use exact geometric predicates")
+    parser.add_argument("--grid", action="store_true",
+                        help="snap coordinates on an integer grid")
+    arguments = parser.parse_args()
+
+    for result in run_batch(arguments.files, arguments.workers, arguments.timeout,
+                            engine=arguments.engine, exact=arguments.exact,
+                            grid=arguments.grid):
+        print(json.dumps(result), flush=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""
+benchmarks of the intersection engines on synthetic workloads.
+
+    python3 -m benchmarks --engines sweep grid --sizes 250 500 1000 --format json
+"""
@@ -0,0 +1,6 @@
+"""
+runs the benchmarks (see benchmarks.suite).
+"""
+from benchmarks.suite import main
+
+main()
@@ -0,0 +1,152 @@
+"""
+scaling benchmarks.
+each engine is timed on each workload for a ladder of sizes (nothing is
+displayed) and the growth of the running time is fitted, as an exponent
+of the number of segments n and of the output size n + k (k being the
+number of intersections).
+"""
+import argparse
+import csv
+import json
+import sys
+from math import log
+from time import perf_counter
+import numpy as np
+from geo.segment import Segment
+from geo.coordinates_hash import CoordinatesHash
+from geo.bo_file import snap_coordinates, LazySegments
+from solution import Solution
+from bo import ENGINES
+from benchmarks.workloads import WORKLOADS
+
+# default sizes ladder
+SIZES = [125, 250, 500, 1000, 2000, 4000]
+
+def build_segments(coordinates):
+    """
+    returns the adjuster and the adjusted segments for a list of segments
+    coordinates (as loading them from a .bo file would do).
+    """
+    adjuster = CoordinatesHash()
+    array = np.array(coordinates, dtype=np.float64).reshape(-1, 4)
+    return adjuster, list(LazySegments(snap_coordinates(array, adjuster)))
+
+def time_engine(engine, coordinates, repeat=1):
+    """
+    runs the engine on the segments (repeat times, on new segments).
+    returns the best time and the number of intersections.
+    """
+    best = None
+    for _ in range(repeat):
+        adjuster, segments = build_segments(coordinates)
+        Segment.adjuster = adjuster
+        solution = Solution(segments)
+        start = perf_counter()
+        ENGINES[engine](segments, solution)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, solution.intersections_count()
+
+def run(workloads, engines, sizes=None, repeat=1, seed=0):
+    """
+    iterates on the measures : dictionaries with workload, engine, n, k and
+    time.
+    """
+    if sizes is None:
+        sizes = SIZES
+    for workload in workloads:
+        for size in sizes:
+            coordinates = WORKLOADS[workload](size, seed)
+            for engine in engines:
+                elapsed, intersections = time_engine(engine, coordinates, repeat)
+                yield {"workload": workload, "engine": engine, "n": len(coordinates),
+                       "k": intersections, "time": elapsed}
+
+def slope(abscissas, ordinates):
+    """
+    least squares slope of the ordinates (None with less than two distinct
+    abscissas).
+    """
+    count = len(abscissas)
+    mean_x, mean_y = sum(abscissas) / count, sum(ordinates) / count
+    variance = sum((x - mean_x) ** 2 for x in abscissas)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(abscissas, ordinates)) / variance
+
+def fit(measures):
+    """
+    fits log-log slopes for each (workload, engine): time as a power of n
+    and of n + k, and k as a power of n.
+    """
+    groups = dict()
+    for measure in measures:
+        groups.setdefault((measure["workload"], measure["engine"]), []).append(measure)
+    fits = []
+    for (workload, engine), group in groups.items():
+        group = [measure for measure in group if measure["time"] > 0]
+        if not group:
+            continue
+        log_n = [log(measure["n"]) for measure in group]
+        log_time = [log(measure["time"]) for measure in group]
+        fits.append({
+            "workload": workload,
+            "engine": engine,
+            "n_exponent": slope(log_n, log_time),
+            "nk_exponent": slope([log(m["n"] + m["k"]) for m in group], log_time),
+            "k_exponent": slope(log_n, [log(m["k"] + 1) for m in group]),
+        })
+    return fits
+
+def write_results(measures, fits, output, output_format):
+    """
+    writes the measures and the fits to the output, in csv (two tables
+    separated by an empty line) or in json.
+    """
+    if output_format == "json":
+        json.dump({"measures": measures, "fits": fits}, output, indent=2)
+        output.write("\n")
+        return
+    for table, rows in enumerate((measures, fits)):
+        if table:
+            output.write("\n")
+        if rows:
+            writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+def main():
+    """
+    runs the benchmarks given on the command line.
+    """
+    parser = argparse.ArgumentParser(description="scaling benchmarks of the engines")
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS),
+                        default=sorted(WORKLOADS), help="workloads (default: all)")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES),
+                        default=["sweep"], help="engines (default: sweep)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES,
+                        help="numbers of segments")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs per measure (the best time is kept)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--exact", action="store_true",
+                        help="use exact geometric predicates")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv",
+                        help="output format (default: csv)")
+    parser.add_argument("--output", default=None, help="output file (default: stdout)")
+    arguments = parser.parse_args()
+
+    Segment.exact = arguments.exact
+    measures = []
+    for measure in run(arguments.workloads, arguments.engines, arguments.sizes,
+                       arguments.repeat, arguments.seed):
+        print("{workload} {engine} n={n} k={k} {time:.3f}s".format(**measure),
+              file=sys.stderr)
+        measures.append(measure)
+    fits = fit(measures)
+    if arguments.output is None:
+        write_results(measures, fits, sys.stdout, arguments.format)
+    else:
+        with open(arguments.output, "w", newline="") as output:
+            write_results(measures, fits, output, arguments.format)
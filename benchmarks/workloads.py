@@ -0,0 +1,142 @@
+"""
+synthetic workloads.
+each generator takes a number of segments (approximately respected for
+the tilings) and a random seed and returns a list of segments coordinates
+(x1, y1, x2, y2).
+"""
+from math import ceil, cos, pi, sin, sqrt
+from random import Random
+
+def uniform(size, seed=0, length=None):
+    """
+    segments of given length (1/sqrt(size) by default) with random centers
+    and directions in the unit square. the number of intersections stays
+    about linear in size.
+    """
+    generator = Random(seed)
+    if length is None:
+        length = 1.0 / sqrt(size)
+    segments = []
+    for _ in range(size):
+        x_center, y_center = generator.random(), generator.random()
+        angle = generator.uniform(0.0, pi)
+        x_half, y_half = 0.5 * length * cos(angle), 0.5 * length * sin(angle)
+        segments.append((x_center - x_half, y_center - y_half,
+                         x_center + x_half, y_center + y_half))
+    return segments
+
+def long_thin(size, seed=0):
+    """
+    long almost horizontal segments crossing the whole unit square.
+    """
+    generator = Random(seed)
+    segments = []
+    for _ in range(size):
+        y = generator.random()
+        segments.append((0.0, y, 1.0, y + generator.uniform(-0.01, 0.01)))
+    return segments
+
+def lattice(size, seed=0):
+    """
+    half horizontal and half vertical segments crossing the whole unit
+    square : about size**2 / 4 intersections.
+    """
+    generator = Random(seed)
+    horizontal = size // 2
+    segments = [(0.0, y, 1.0, y) for y in (generator.random() for _ in range(horizontal))]
+    segments.extend((x, 0.0, x, 1.0)
+                    for x in (generator.random() for _ in range(size - horizontal)))
+    return segments
+
+def collinear(size, seed=0, lines=None):
+    """
+    overlapping segments on a few random lines (sqrt(size) by default)
+    crossing the unit square.
+    """
+    generator = Random(seed)
+    if lines is None:
+        lines = max(1, int(sqrt(size)))
+    supports = [(generator.random(), generator.random(), generator.uniform(0.0, pi))
+                for _ in range(lines)]
+    segments = []
+    for index in range(size):
+        x_origin, y_origin, angle = supports[index % lines]
+        start, end = generator.uniform(-0.5, 0.5), generator.uniform(-0.5, 0.5)
+        segments.append((x_origin + start * cos(angle), y_origin + start * sin(angle),
+                         x_origin + end * cos(angle), y_origin + end * sin(angle)))
+    return segments
+
+def stars(size, seed=0, branches=8):
+    """
+    stars of branches segments sharing their center (random centers in the
+    unit square).
+    """
+    generator = Random(seed)
+    segments = []
+    while len(segments) < size:
+        x_center, y_center = generator.random(), generator.random()
+        for branch in range(min(branches, size - len(segments))):
+            angle = 2.0 * pi * branch / branches
+            length = generator.uniform(0.01, 0.1)
+            segments.append((x_center, y_center,
+                             x_center + length * cos(angle), y_center + length * sin(angle)))
+    return segments
+
+# the triangle of the tests/triangle_* files and its box
+TRIANGLE = [(2.0, 2.0, 7.0, 3.0), (2.0, 2.0, 5.0, 5.0), (7.0, 3.0, 5.0, 5.0)]
+TRIANGLE_BOX = (2.0, 2.0, 7.0, 5.0)
+
+def triangle(size, seed=0, tiling="squares"):
+    """
+    the triangle of tests/ over a tiling of its box ("squares", "bricks" or
+    "hexagons", as in the triangle_*, triangle_b_* and triangle_h_* files),
+    the tiles size being chosen to get about size segments.
+    """
+    #pylint: disable=unused-argument
+    x_min, y_min, x_max, y_max = TRIANGLE_BOX
+    area = (x_max - x_min) * (y_max - y_min)
+    tiles = max(1, (size - len(TRIANGLE)) // (3 if tiling == "hexagons" else 2))
+    side = sqrt(area / tiles)
+    segments = list(TRIANGLE)
+    if tiling == "squares":
+        for column in range(ceil((x_max - x_min) / side)):
+            for row in range(ceil((y_max - y_min) / side)):
+                x, y = x_min + column * side, y_min + row * side
+                segments.append((x, y, x + side, y))
+                segments.append((x, y, x, y + side))
+    elif tiling == "bricks":
+        # bricks twice as wide as high
+        width, height = side * sqrt(2.0), side / sqrt(2.0)
+        for row in range(ceil((y_max - y_min) / height)):
+            shift = 0.5 * width * (row % 2)
+            for column in range(ceil((x_max - x_min) / width)):
+                x, y = x_min + column * width + shift, y_min + row * height
+                segments.append((x + width, y, x, y))
+                segments.append((x + width, y, x + width, y - height))
+    elif tiling == "hexagons":
+        # half hexagons of edge length edge, alternately up and down
+        edge = side / sqrt(1.5 * sqrt(3.0))
+        height = edge * sqrt(3.0) / 2.0
+        for row in range(ceil((y_max - y_min) / height)):
+            y, shift = y_min + row * height, 1.5 * edge * (row % 2)
+            below = y - height if row % 2 == 0 else y + height
+            for column in range(ceil((x_max - x_min) / (3.0 * edge))):
+                x = x_min + column * 3.0 * edge + shift
+                segments.append((x, y, x - 0.5 * edge, below))
+                segments.append((x - 0.5 * edge, below, x - 1.5 * edge, below))
+                segments.append((x - 1.5 * edge, below, x - 2.0 * edge, y))
+    else:
+        raise ValueError("unknown tiling: {}".format(tiling))
+    return segments
+
+# all the workloads by name
+WORKLOADS = {
+    "uniform": uniform,
+    "long_thin": long_thin,
+    "lattice": lattice,
+    "collinear": collinear,
+    "stars": stars,
+    "triangle": triangle,
+    "triangle_b": lambda size, seed=0: triangle(size, seed, "bricks"),
+    "triangle_h": lambda size, seed=0: triangle(size, seed, "hexagons"),
+}
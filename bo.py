@@ -6,66 +6,281 @@ for each file:
     - run bentley ottmann
     - display results
     - print some statistics
+
+it can also be used as a library, without any display:
+
+    solution = intersect(segments, engine="sweep")
 """
-import sys
-from sortedcontainers import SortedList
-from geo.segment import Segment, load_segments
-from geo.tycat import tycat
-from events import Events
-from solution import Solution
+import argparse
+import os
+from contextlib import contextmanager
+from geo.point import Point
+from geo.segment import Segment
+from geo.coordinates_hash import CoordinatesHash, GridHash, PRECISION
+from geo.bo_file import load_segments, load_red_blue, write_events, read_events, CHUNK_SIZE
+from events import Events, StreamedEvents, RedBlueEvents
+from brute_force import brute_force
+from spatial_grid import grid_intersections
+from slabs import parallel_bentley_ottmann
+from solution import Solution, CountingSolution, FirstIntersection, IntersectionFound
+from living_segments import LivingSegments
+from metrics import Metrics
+from sweep_trace import TraceRecorder
 
 CREATION = 0
 DESTRUCTION = 1
 INTERSECTION = 2
 
-def bentley_ottmann(segments, solution):
+def bentley_ottmann(segments, solution, metrics=None, touching=True):
     """
     computes and returns the result of the bentley ottmann algorithm for the given
     segments and ajuster.
     the intesections are given for each segments.
+    if a Metrics object is given the run is recorded in it (and it is
+    kept in the solution).
+    if touching is false, points which are endpoints of all the segments
+    through them are not reported.
     """
+    if metrics is not None:
+        solution.metrics = metrics
+        with metrics.recording():
+            with metrics.phase("events building"):
+                events = Events(segments)
+            events.touching = touching
+            with metrics.phase("sweep"):
+                sweep(events, solution)
+        return
+
     # adds all the creation and destruction events for the given segments
     events = Events(segments)
+    events.touching = touching
+    sweep(events, solution)
 
-
+def sweep(events, solution):
+    """
+    processes all the events, filling the solution.
+    """
     # creates the structure for the 'alive' segments:
-    # the structure contains a list with the segment and it's key
-    living_segments = SortedList()
+    # each segment keeps a handle on its place in the structure
+    living_segments = LivingSegments()
     Segment.current_point = None
 
-    while not events.isempty():
+    try:
+        while not events.isempty():
+
+            # getting the first event in the events list
+            current_event = events.pop()
+
+            #updating the global current point
+            Segment.current_point = current_event.key
+
+            #reordering the segments passing through the current event
+            events.handle_event(current_event, living_segments, solution)
+    finally:
+        # segments left living by an interrupted sweep (for example by
+        # first_intersection) must not keep their handles in the dropped
+        # structure
+        for segment in living_segments:
+            segment.living_node = None
+
+def red_blue_bentley_ottmann(red, blue, solution, pruned=True):
+    """
+    adds to the solution the intersections between the red and the blue
+    segments only.
+    if pruned, segments of a same colour are never tested against each
+    other: each colour must then be free of crossings (touching on
+    endpoints is allowed) and the cost only depends on the red blue
+    intersections. otherwise any segments can be given.
+    """
+    blue = list(blue)
+    events = RedBlueEvents(list(red) + blue, set(blue), pruned)
+    sweep(events, solution)
+
+def stream_bentley_ottmann(source, adjuster=None, chunk_size=CHUNK_SIZE):
+    """
+    runs bentley ottmann on a .bo file (path or binary stream) larger than
+    memory : the endpoints events are first sorted on disk and then streamed
+    to the sweep, segments only exist from their creation to their
+    destruction (and in the solution).
+    returns the adjuster and the solution.
+    """
+    if adjuster is None:
+        adjuster = CoordinatesHash()
+    Segment.adjuster = adjuster
+    events_filename = write_events(source, adjuster=adjuster, chunk_size=chunk_size)
+    try:
+        solution = Solution([])
+        events = StreamedEvents(read_events(events_filename, chunk_size), solution)
+        sweep(events, solution)
+    finally:
+        os.remove(events_filename)
+    return adjuster, solution
+
+# intersection engines: functions filling a solution with the intersections
+# of the segments
+ENGINES = {
+    "sweep": bentley_ottmann,
+    "grid": grid_intersections,
+    "brute": brute_force,
+    "slabs": parallel_bentley_ottmann,
+}
+
+def run_engine(segments, solution, engine="sweep", metrics=None, touching=True):
+    """
+    fills the solution with the given engine, recording the run in metrics
+    if given.
+    touching points can only be left out by the sweep (see
+    bentley_ottmann).
+    """
+    if not touching and engine != "sweep":
+        raise ValueError("touching points can only be left out by the sweep engine")
+    if engine == "sweep":
+        bentley_ottmann(segments, solution, metrics, touching)
+    elif metrics is None:
+        ENGINES[engine](segments, solution)
+    else:
+        solution.metrics = metrics
+        with metrics.recording(), metrics.phase(engine):
+            ENGINES[engine](segments, solution)
+    return solution
+
+@contextmanager
+def adjusted_segments(segments, precision=PRECISION, exact=False):
+    """
+    adjusts the given segments for the engines while in the block.
+    segments are Segment objects (already adjusted, as loaded by
+    load_segments) or (x1, y1, x2, y2) coordinates which are adjusted with
+    the given precision and turned into segments (indexed on their
+    position).
+    """
+    adjuster = CoordinatesHash(precision)
+    adjusted = []
+    for index, segment in enumerate(segments):
+        if isinstance(segment, Segment):
+            # known points are kept by the adjuster
+            for point in segment.endpoints:
+                adjuster.hash_point(point)
+        else:
+            x_1, y_1, x_2, y_2 = segment
+            segment = Segment([adjuster.hash_point(Point([x_1, y_1])),
+                               adjuster.hash_point(Point([x_2, y_2]))], index)
+        adjusted.append(segment)
 
-        # getting the first event in the events list
-        current_event = events.event_list.pop(0)
+    previous = Segment.adjuster, Segment.exact
+    Segment.adjuster, Segment.exact = adjuster, exact
+    try:
+        yield adjusted
+    finally:
+        Segment.adjuster, Segment.exact = previous
 
-        #finishing the segments which end on the current event
-        events.finish_segments(current_event, living_segments, solution)
+def intersect(segments, engine="sweep", precision=PRECISION, exact=False, metrics=None,
+              touching=True):
+    """
+    computes and returns the solution for the given segments (see
+    adjusted_segments), without any display nor file.
+    if touching is false, points which are endpoints of all the segments
+    through them are left out (sweep engine only).
+    """
+    with adjusted_segments(segments, precision, exact) as adjusted:
+        return run_engine(adjusted, Solution(adjusted), engine, metrics, touching)
 
-        #updating the global current point
-        Segment.current_point = current_event.key
+def intersect_red_blue(red, blue, precision=PRECISION, exact=False, pruned=True):
+    """
+    computes and returns the solution holding the intersections between the
+    red and the blue segments (see adjusted_segments and
+    red_blue_bentley_ottmann, blue segments being indexed after the red
+    ones).
+    """
+    red = list(red)
+    with adjusted_segments(red + list(blue), precision, exact) as adjusted:
+        solution = Solution(adjusted)
+        red_blue_bentley_ottmann(adjusted[:len(red)], adjusted[len(red):], solution, pruned)
+        return solution
+
+def count_intersections(segments, precision=PRECISION, exact=False, touching=True):
+    """
+    returns the number of intersections of the given segments (see
+    adjusted_segments), without storing them.
+    if touching is false, points which are endpoints of all the segments
+    through them are not counted.
+    """
+    with adjusted_segments(segments, precision, exact) as adjusted:
+        solution = CountingSolution(adjusted)
+        bentley_ottmann(adjusted, solution, touching=touching)
+        return solution.intersections_count()
+
+def first_intersection(segments, touching=True):
+    """
+    returns the first (highest) intersection point of the given adjusted
+    segments, or None if they do not intersect.
+    the sweep stops on the first crossing, as in shamos hoey's algorithm:
+    until then only the endpoints and the intersections of neighbours are
+    processed so it runs in O(n log n).
+    if touching is false, points which are endpoints of all the segments
+    through them are ignored: the edges of a polyline then only intersect
+    if the polyline is not simple.
+    """
+    try:
+        bentley_ottmann(segments, FirstIntersection(segments), touching=touching)
+    except IntersectionFound as found:
+        return found.point
+    return None
 
-        #beginning the segments which start from the current_event
-        events.begin_segments(current_event, living_segments, solution)
+def any_intersection(segments, precision=PRECISION, exact=False, touching=True):
+    """
+    returns the first intersection point of the given segments (see
+    adjusted_segments and first_intersection) or None if they do not
+    intersect.
+    """
+    with adjusted_segments(segments, precision, exact) as adjusted:
+        return first_intersection(adjusted, touching)
 
-def test(filename):
+def test(filename, adjuster=None, engine="sweep", metrics=False, display=True, trace=None,
+         mode="all", touching=True):
     """
-    run bentley ottmann
+    run bentley ottmann (or an other engine), recording and printing its
+    metrics if asked, and writing the trace of the sweep in the file trace
+    if given.
+    in "count" mode the intersections are only counted and in "any" mode
+    the sweep stops on the first one (both only with the sweep engine).
+    points where segments only touch on their endpoints are left out if
+    touching is false (sweep engine only).
     """
-    adjuster, segments = load_segments(filename)
+    adjuster, segments = load_segments(filename, adjuster)
 
     # The adjuster is used by all the segments to compute their keys
     Segment.adjuster = adjuster
 
+    if mode == "any":
+        point = first_intersection(segments, touching)
+        if display:
+            from geo.tycat import tycat
+            tycat(segments, [] if point is None else point)
+        if point is None:
+            print("\n Aucune intersection")
+        else:
+            print("\n Première intersection :", point)
+        return point
+
     # Initializes the solution for the segments
-    solution = Solution(segments)
+    solution = CountingSolution(segments) if mode == "count" else Solution(segments)
 
     # Algorithm
-    bentley_ottmann(segments, solution)
+    if trace is None:
+        run_engine(segments, solution, engine, Metrics() if metrics else None, touching)
+    else:
+        with TraceRecorder(trace).recording():
+            run_engine(segments, solution, engine, Metrics() if metrics else None, touching)
 
     # Printing the output of the algorithm
-    tycat(segments)
-    tycat(solution.segments(), solution.intersection_points())
+    if display:
+        from geo.tycat import tycat
+        tycat(segments)
+        if mode != "count":
+            tycat(solution.segments(), solution.intersection_points())
     solution.summary()
+    if solution.metrics is not None:
+        solution.metrics.summary()
 
     # Compute the solution with the simple algorithm
     # solution.simple_algorithm()
@@ -73,11 +288,73 @@ def test(filename):
     # In order to draw graph
     return solution
 
+def test_red_blue(red_filename, blue_filename, adjuster=None, display=True, pruned=True):
+    """
+    run the red blue sweep on two files and print the intersections
+    between their segments
+    """
+    adjuster, red, blue = load_red_blue(red_filename, blue_filename, adjuster)
+    Segment.adjuster = adjuster
+    red, blue = list(red), list(blue)
+    solution = Solution(red + blue)
+    red_blue_bentley_ottmann(red, blue, solution, pruned)
+    if display:
+        from geo.tycat import tycat
+        tycat(red, blue, solution.intersection_points())
+    solution.summary()
+    return solution
+
 def main():
     """
     launch test on each file.
     """
-    for filename in sys.argv[1:]:
-        test(filename)
+    parser = argparse.ArgumentParser(description="bentley ottmann on .bo files")
+    parser.add_argument("files", nargs="*", help=".bo files to test")
+    parser.add_argument("--exact", action="store_true",
+                        help="use exact geometric predicates")
+    parser.add_argument("--grid", action="store_true",
+                        help="snap coordinates on an integer grid")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="sweep",
+                        help="intersection engine (default: sweep)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="count the operations and time the phases")
+    parser.add_argument("--no-display", dest="display", action="store_false",
+                        help="do not draw the segments and the intersections")
+    parser.add_argument("--trace", metavar="DIRECTORY", default=None,
+                        help="write the traces of the sweeps in the directory")
+    parser.add_argument("--mode", choices=["all", "count", "any"], default="all",
+                        help="compute all the intersections, only count them or stop on the "
+                        "first one (default: all)")
+    parser.add_argument("--red-blue", action="store_true",
+                        help="only intersect the segments of files taken by pairs (red file, "
+                        "blue file) with the segments of the other file")
+    parser.add_argument("--self-crossing", action="store_true",
+                        help="with --red-blue, segments of a same file may cross (slower)")
+    parser.add_argument("--no-touching", dest="touching", action="store_false",
+                        help="ignore the points where all the segments only touch on their "
+                        "endpoints (to check that polylines are simple with --mode any)")
+    arguments = parser.parse_args()
+    if arguments.red_blue and len(arguments.files) % 2:
+        parser.error("--red-blue needs pairs of files")
+    if arguments.mode != "all" and arguments.engine != "sweep":
+        parser.error("--mode {} needs the sweep engine".format(arguments.mode))
+    if not arguments.touching and arguments.engine != "sweep":
+        parser.error("--no-touching needs the sweep engine")
+
+    Segment.exact = arguments.exact
+    if arguments.red_blue:
+        for red, blue in zip(arguments.files[::2], arguments.files[1::2]):
+            test_red_blue(red, blue, GridHash() if arguments.grid else None, arguments.display,
+                          not arguments.self_crossing)
+        return
+    if arguments.trace is not None:
+        os.makedirs(arguments.trace, exist_ok=True)
+    for filename in arguments.files:
+        trace = None
+        if arguments.trace is not None:
+            trace = os.path.join(arguments.trace, os.path.basename(filename) + ".trace")
+        test(filename, GridHash() if arguments.grid else None, arguments.engine,
+             arguments.metrics, arguments.display, trace, arguments.mode, arguments.touching)
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+brute force reference engine (requires numpy).
+all the pairs of segments are tested, by tiles of pairs: the bounding boxes
+of a whole tile are compared at once and only the remaining pairs are
+intersected (with the same floating point operations as
+Segment.intersection_with, or with exact predicates in exact mode).
+"""
+import numpy as np
+from geo.point import Point
+from geo.segment import Segment, PARALLEL_LIMIT, CONTAINS_LIMIT, contains_margin
+from geo.predicates import DETERMINANT_BOUND
+
+# number of segments on each side of a tile
+TILE_SIZE = 512
+
+def brute_force(segments, solution, tile_size=TILE_SIZE):
+    """
+    computes all the intersections between the given segments and adds them
+    to the solution, as testing segment1.intersection_with(segment2) on each
+    pair (in the order of itertools.combinations) would do.
+    memory is bounded by the size of the tiles.
+    """
+    segments = list(segments)
+    coordinates = np.array([[*s.endpoints[0].coordinates, *s.endpoints[1].coordinates]
+                            for s in segments], dtype=np.float64).reshape(-1, 4)
+    boxes = _bounding_boxes(coordinates)
+    for row_start in range(0, len(segments), tile_size):
+        rows = slice(row_start, row_start + tile_size)
+        intersections = []
+        for column_start in range(row_start, len(segments), tile_size):
+            columns = slice(column_start, column_start + tile_size)
+            # pairs of the tile with overlapping boxes
+            first, second = np.nonzero(
+                (boxes[rows, 0, None] <= boxes[None, columns, 2]) &
+                (boxes[None, columns, 0] <= boxes[rows, 2, None]) &
+                (boxes[rows, 1, None] <= boxes[None, columns, 3]) &
+                (boxes[None, columns, 1] <= boxes[rows, 3, None]))
+            first += row_start
+            second += column_start
+            kept = first < second
+            intersections.extend(_intersect_pairs(segments, coordinates,
+                                                  first[kept], second[kept]))
+
+        # the points are adjusted in the order of the pairs
+        intersections.sort(key=lambda intersection: intersection[:2])
+        for index1, index2, point in intersections:
+            point = Segment.adjuster.hash_point(point)
+            solution.add(segments[index1], point)
+            solution.add(segments[index2], point)
+    return solution
+
+def _bounding_boxes(coordinates):
+    """
+    returns the (xmin, ymin, xmax, ymax) boxes of the segments, enlarged
+    to contain all the points accepted by Segment.contains.
+    """
+    x_1, y_1, x_2, y_2 = coordinates.T
+    boxes = np.column_stack((np.minimum(x_1, x_2), np.minimum(y_1, y_2),
+                             np.maximum(x_1, x_2), np.maximum(y_1, y_2)))
+    if not Segment.exact:
+        lengths = np.sqrt((x_1 - x_2) * (x_1 - x_2) + (y_1 - y_2) * (y_1 - y_2))
+        margins = contains_margin(lengths)
+        boxes[:, :2] -= margins[:, None]
+        boxes[:, 2:] += margins[:, None]
+    return boxes
+
+def _intersect_pairs(segments, coordinates, first, second):
+    """
+    iterates on (index1, index2, point) for the intersecting pairs among the
+    given ones.
+    """
+    if Segment.exact:
+        # exact decisions are only taken on the pairs which may intersect
+        kept = _may_cross(coordinates[first], coordinates[second]) & \
+            _may_cross(coordinates[second], coordinates[first])
+        for index1, index2 in zip(first[kept].tolist(), second[kept].tolist()):
+            point = segments[index1].intersection_with(segments[index2])
+            if point is not None:
+                yield index1, index2, point
+        return
+
+    x_1, y_1, x_2, y_2 = coordinates[first].T
+    x_3, y_3, x_4, y_4 = coordinates[second].T
+    # same operations as line_intersection_with
+    width1, height1 = x_2 - x_1, y_2 - y_1
+    width2, height2 = x_4 - x_3, y_4 - y_3
+    denominator = -height1 * width2 + width1 * height2
+    not_parallel = np.abs(denominator) >= PARALLEL_LIMIT
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = (-(y_3 - y_1) * width2 + (x_3 - x_1) * height2) / denominator
+        x_point, y_point = x_1 + width1 * alpha, y_1 + height1 * alpha
+    # same operations as contains
+    with np.errstate(invalid="ignore"):
+        found = not_parallel & \
+            _contains(x_1, y_1, x_2, y_2, x_point, y_point) & \
+            _contains(x_3, y_3, x_4, y_4, x_point, y_point)
+    yield from zip(first[found].tolist(), second[found].tolist(),
+                   (Point(c) for c in zip(x_point[found].tolist(), y_point[found].tolist())))
+
+def _distance(x_1, y_1, x_2, y_2):
+    """
+    distances between arrays of points (as Point.distance_to).
+    """
+    diff_x, diff_y = x_1 - x_2, y_1 - y_2
+    return np.sqrt(diff_x * diff_x + diff_y * diff_y)
+
+def _contains(x_1, y_1, x_2, y_2, x_point, y_point):
+    """
+    are the points on the segments (as Segment.contains) ?
+    """
+    distance = _distance(x_point, y_point, x_1, y_1) + _distance(x_point, y_point, x_2, y_2)
+    return np.abs(distance - _distance(x_1, y_1, x_2, y_2)) < CONTAINS_LIMIT
+
+def _may_cross(coordinates1, coordinates2):
+    """
+    false for the pairs where the second segment is surely on one side of
+    the line of the first one (floating point orientations with their
+    error bound, as in geo.predicates).
+    """
+    x_1, y_1, x_2, y_2 = coordinates1.T
+    sides = []
+    for x_3, y_3 in (coordinates2[:, :2].T, coordinates2[:, 2:].T):
+        left = (x_2 - x_1) * (y_3 - y_1)
+        right = (y_2 - y_1) * (x_3 - x_1)
+        determinant = left - right
+        bound = DETERMINANT_BOUND * (np.abs(left) + np.abs(right))
+        sides.append(np.where(determinant > bound, 1, np.where(-determinant > bound, -1, 0)))
+    return (sides[0] != sides[1]) | (sides[0] == 0)
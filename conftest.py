@@ -0,0 +1,3 @@
+"""
+makes the modules of the repository importable by the tests in tests/.
+"""
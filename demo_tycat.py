@@ -4,10 +4,11 @@ script de demonstration pour tycat.
 """
 
 from random import random
-from itertools import combinations, product
+from itertools import combinations
 from geo.point import Point
 from geo.segment import Segment
 from geo.tycat import tycat
+from bo import intersect_red_blue
 
 def main():
     """
@@ -21,7 +22,8 @@ def main():
     tycat(zip(iter(points), iter(segments)))
     print("tycat(*zip(iter(points), iter(segments)))")
     tycat(*zip(iter(points), iter(segments)))
-    intersections = filter(None, (c[0].intersection_with(c[1]) for c in product(*segments)))
+    # segments of a same colour cross each other: no pruning
+    intersections = intersect_red_blue(*segments, pruned=False).intersection_points()
     print("intersections entre rouge et vert")
     tycat(segments[0], segments[1], intersections)
 
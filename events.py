@@ -4,9 +4,14 @@ Events module
 contains the Event object and the Events container.
 """
 
-from sortedcontainers import SortedList, SortedListWithKey
+from functools import cmp_to_key
+from heapq import heapify, heappop, heappush
 from geo.point import Point
-from geo.segment import Segment
+from geo.segment import Segment, compare_slopes
+from geo.coordinates_hash import CoordinatesHash
+from geo.predicates import orientation, aligned, in_box
+from living_segments import LivingSegments
+from solution import Solution
 
 CREATION = 0
 DESTRUCTION = 1
@@ -30,6 +35,8 @@ class Event:
         # Keeping the event_type for debug purpose
         self.type = event_type
         self.key = point
+        # events are processed from top to bottom and from right to left
+        self.order = (-point.coordinates[1], -point.coordinates[0])
 
     def __eq__(self, other):
         """
@@ -37,242 +44,410 @@ class Event:
         """
         return self.key == other.key
 
+    def __lt__(self, other):
+        """
+        an event is lower than an other one if it is processed before
+        """
+        return self.order < other.order
+
     def event_comparison(self):
         """
         used as a key to compare the elements beetween them.
         """
-        return (-self.key.coordinates[1], -self.key.coordinates[0])
+        return self.order
 
 class Events:
     """
     Contains all the events and keeps the events in order for the insertion
     and the suppression.
     """
+    # are points which are endpoints of all the segments through them
+    # (touching segments, as the vertices of a polyline) reported ?
+    touching = True
 
     def __init__(self, segments):
         """
-        creates all the events for the initial segments and write them
-        in the sortedlist (with key) structure in order to have a near
-        tree structure complexity
+        creates all the events for the initial segments and builds the
+        heap of events at once in O(n).
         """
         self.begin_points = dict()
         self.end_points = dict()
+        # segments detected crossing on a future point
+        self.inter_points = dict()
 
-        self.event_list = SortedListWithKey(None, Event.event_comparison)
+        # the events waiting in the heap, indexed on their point
+        self.event_points = dict()
         for segment in segments:
             self.init_segment_events(segment)
+        self.event_list = list(self.event_points.values())
+        heapify(self.event_list)
 
     def __str__(self):
         """
         returns the events from the event list (debugg)
         """
-        return " \n ".join([str(event.key) for event in iter(self.event_list)])
+        return " \n ".join([str(event.key) for event in sorted(self.event_list)])
 
     def event_exists(self, event):
         """
         returns ture if the event already exists in the events structure.
         """
-        for search_event in self.event_list:
-            if search_event == event:
-                return True
-        return False
+        return event.key in self.event_points
+
+    def add_event(self, event_type, point):
+        """
+        adds an event on the point if there is none yet (merging the events
+        on the same point) and returns the event on the point.
+        """
+        event = self.event_points.get(point)
+        if event is None:
+            event = Event(event_type, point)
+            self.event_points[point] = event
+            heappush(self.event_list, event)
+        return event
 
     def init_segment_events(self, segment):
         """
         creates two event for the segment
         """
-        # Creating the events for the segment
-        event_creation = Event(CREATION, max(segment.endpoints))
-        event_destruction = Event(DESTRUCTION, min(segment.endpoints))
+        # Creating the events for the segment (the heap is built afterwards)
+        upper, lower = max(segment.endpoints), min(segment.endpoints)
+        if upper not in self.event_points:
+            self.event_points[upper] = Event(CREATION, upper)
+        if lower not in self.event_points:
+            self.event_points[lower] = Event(DESTRUCTION, lower)
 
         # Adding the segment in the hashtables based on the event key
-        if event_creation.key in self.begin_points:
-            # if the beginning point alreay exists
-            self.begin_points[event_creation.key].append(segment)
-        else:
-            self.begin_points[event_creation.key] = [segment]
-            #Adds the event in the events structure
-            if not self.event_exists(event_creation):
-                self.event_list.add(event_creation)
-
-        if event_destruction.key in self.end_points:
-            self.end_points[event_destruction.key].append(segment)
-        else:
-            self.end_points[event_destruction.key] = [segment]
-            #Adds the event in the event structure
-            if not self.event_exists(event_destruction):
-                self.event_list.add(event_destruction)
+        self.begin_points.setdefault(upper, []).append(segment)
+        self.end_points.setdefault(lower, []).append(segment)
 
     def isempty(self):
         """
         returns true is there are no more events in the structure
         """
-        return len(self.event_list) == 0
+        return not self.event_list
 
-    def finish_segments(self, event, living_segments, solution):
+    def pop(self):
         """
-        finishes the segments on event
+        removes and returns the next event.
         """
-        # if no segments are finishing on the current event
-        if not event.key in self.end_points:
-            return
-
-
-        for segment in self.end_points[event.key]:
-
-            #neighbours for the current segment
-            [neighbour_left, neighbour_right] = list(neighbours(segment, living_segments))
-
-            # removes the segment on the current event
-            for index, seg in enumerate(living_segments):
-                if seg == segment:
-                    living_segments.pop(index)
-                    break
-
-            # Test the intersections if there is only two neighbours
-            if not(neighbour_left and neighbour_right):
-                continue
+        event = heappop(self.event_list)
+        del self.event_points[event.key]
+        return event
 
-            inter_point = neighbour_left.intersection_with(neighbour_right)
-            if not inter_point:
-                continue
-
-            inter_point = Segment.adjuster.hash_point(inter_point)
-
-            if not intersection_is_correct(inter_point, neighbour_left, neighbour_right):
+    def handle_event(self, event, living_segments, solution):
+        """
+        processes the event on the current point: the segments passing
+        through it are removed from the living segments and the ones going
+        on below it are inserted back in their new order. only the new
+        neighbours are then tested for intersections.
+        """
+        point = event.key
+        ending = set(self.end_points.get(point, []))
+        beginning = [segment for segment in self.begin_points.get(point, [])
+                     if segment not in ending]
+
+        # Removing the segments passing through the point while keeping
+        # the nodes on their left and right
+        left_node, passing, right_node, gaps = \
+            self.remove_passing_segments(point, living_segments)
+        going_on = [segment for segment in passing if segment not in ending]
+        going_on.extend(beginning)
+
+        # Testing the new neighbours. The neighbours whose intersection is
+        # rounded on the point are also passing through it and the ones
+        # whose intersection is rounded on the sweeping line on the right of
+        # the point (in the past) are swapped now.
+        rounded = []
+        while True:
+            going_on.sort(key=cmp_to_key(compare_slopes))
+            left = left_node.segment if left_node is not None else None
+            right = right_node.segment if right_node is not None else None
+            if going_on:
+                on_left = self.find_new_event(left, going_on[0], point)
+                if on_left is not None and on_left != point:
+                    rounded.append((on_left, [left, going_on[0]]))
+                on_right = self.find_new_event(going_on[-1], right, point)
+                if on_right is not None and on_right != point:
+                    rounded.append((on_right, [going_on[-1], right]))
+            else:
+                on_left = on_right = self.find_new_event(left, right, point)
+                if on_left is not None and on_left != point:
+                    rounded.append((on_left, [left, right]))
+            if on_left is None and on_right is None:
+                break
+            if on_left is not None:
+                left_node = left_node.previous
+                living_segments.remove(left)
+                if on_left == point:
+                    passing.append(left)
+                going_on.append(left)
+            if on_right is not None:
+                right_node = right_node.next
+                living_segments.remove(right)
+                if on_right == point:
+                    passing.append(right)
+                going_on.append(right)
+
+        # Adding the point to the segments crossing on it
+        crossing = passing + beginning
+        if len(crossing) > 1:
+            rounded.append((point, crossing))
+        for crossing_point, crossing in rounded:
+            if self.touching or \
+               any(crossing_point not in segment.endpoints for segment in crossing):
+                self.add_crossings(crossing_point, crossing, solution)
+
+        # Inserting back the segments going on below the point in their new
+        # order
+        for segment in going_on:
+            living_segments.insert(segment, right_node)
+
+        for gap in gaps:
+            if gap is not left and gap.living_node is not None:
+                self.find_new_event(gap, living_segments.neighbours(gap)[1], point)
+
+    def remove_passing_segments(self, point, living_segments):
+        """
+        removes from the living segments the ones passing through the point.
+        returns them (ordered) with the nodes on their left and right.
+        segments which were known to pass through the point but were not
+        found around it (numerical errors) leave gaps : their left
+        neighbours are also returned in order to test the new neighbours.
+        """
+        # Segments known to pass through the point
+        passing, gaps = [], []
+        known = self.end_points.get(point, []) + self.inter_points.pop(point, [])
+        while known:
+            segment = known.pop()
+            if segment.living_node is None:
                 continue
+            [left, right] = living_segments.neighbours(segment)
+            gaps.append(left)
+            living_segments.remove(segment)
+            passing.append(segment)
+            if Segment.exact:
+                # aligned neighbours overlapping on the point are also passing
+                # through it (the point is rounded so they cannot be found with
+                # exact orientations)
+                known.extend(neighbour for neighbour in (left, right)
+                             if neighbour is not None and aligned(segment, neighbour) and
+                             in_box(*neighbour.endpoints, point))
+        gaps = [gap for gap in gaps if gap is not None]
+
+        # Searching for the other segments touching the point (for example
+        # a segment beginning on an other one)
+        tolerance = 0.5 * 10**-Segment.adjuster.precision
+        right_node = living_segments.locate(lambda segment: side(segment, point, tolerance))
+        while right_node is not None and side(right_node.segment, point, tolerance) == 0:
+            passing.append(right_node.segment)
+            right_node = right_node.next
+        if right_node is not None:
+            left_node = right_node.previous
+        else:
+            left_node = living_segments.last()
+        passing_set = set(passing)
+        while left_node is not None and left_node.segment in passing_set:
+            left_node = left_node.previous
 
-            # Adding the intersection to the solution
-            solution.add(neighbour_left, inter_point)
-            solution.add(neighbour_right, inter_point)
+        for segment in passing:
+            living_segments.remove(segment)
+        return left_node, passing, right_node, gaps
 
-            # If no event exists for this intersection, the event is created
-            if inter_point not in self.end_points and inter_point not in self.begin_points:
-                self.add_intersection(inter_point)
+    def find_new_event(self, left, right, point):
+        """
+        tests the intersection between two neighbours and adds the
+        intersection event if it is below the current point.
+        returns the (adjusted) intersection if the neighbours must be
+        swapped on the current point: it is rounded on the current point or
+        it is in the past while the neighbours are still in their order
+        above it (the intersection or the current point were rounded
+        across the sweeping line). returns None otherwise.
+        """
+        if left is None or right is None:
+            return None
+        inter_point = left.intersection_with(right)
+        if inter_point is None:
+            return None
+        inter_point = Segment.adjuster.hash_point(inter_point)
+        if inter_point == point:
+            return inter_point
+
+        # The intersection is already in the past: the neighbours are
+        # swapped now unless they already crossed there
+        if not inter_point < point:
+            if compare_slopes(left, right) > 0:
+                return inter_point
+            return None
+
+        self.add_event(INTERSECTION, inter_point)
+        crossing = self.inter_points.setdefault(inter_point, [])
+        for segment in (left, right):
+            if segment not in crossing:
+                crossing.append(segment)
+        return None
+
+    def add_crossings(self, point, crossing, solution):
+        """
+        adds the point to the segments crossing on it (see add_crossings).
+        """
+        add_crossings(point, crossing, solution)
 
-            # Adds the segments to the end hashtable on intersection
-            end_point = self.end_points[inter_point]
-            if not neighbour_left in end_point:
-                end_point.append(neighbour_left)
-            if not neighbour_right in end_point:
-                end_point.append(neighbour_right)
+class RedBlueEvents(Events):
+    """
+    events of a sweep only reporting the intersections between a red and a
+    blue segment.
+    when pruned, neighbours of a same colour are never tested, so that the
+    cost only depends on the red blue intersections: segments of a same
+    colour must then not cross each other (they may touch on endpoints).
+    """
+    def __init__(self, segments, blue, pruned=True):
+        """
+        blue is the set of the blue segments, all other segments are red.
+        """
+        super().__init__(segments)
+        self.blue = blue
+        self.pruned = pruned
 
-            # Adds the segment to the begin hashtable if it is not
-            # on an endpoint of the segment (the "T" case)
-            begin_point = self.begin_points[inter_point]
-            if not neighbour_left in begin_point and not inter_point in neighbour_left.endpoints:
-                begin_point.append(neighbour_left)
-            if not neighbour_right in begin_point and not inter_point in neighbour_right.endpoints:
-                begin_point.append(neighbour_right)
+    def find_new_event(self, left, right, point):
+        """
+        tests the intersection between two neighbours of different colours
+        (see Events.find_new_event).
+        """
+        if self.pruned and left is not None and right is not None and \
+           (left in self.blue) == (right in self.blue):
+            return None
+        return super().find_new_event(left, right, point)
 
-    def begin_segments(self, event, living_segments, solution):
+    def add_crossings(self, point, crossing, solution):
         """
-        begins the segments on event
+        adds the point to the segments crossing a segment of the other
+        colour on it.
         """
-        # Check if segments are beginning from the current event
-        if not event.key in self.begin_points:
+        blue = [segment for segment in crossing if segment in self.blue]
+        if not blue or len(blue) == len(crossing):
             return
+        red = [segment for segment in crossing if segment not in self.blue]
+        add_red_blue_crossings(point, red, blue, solution)
+        add_red_blue_crossings(point, blue, red, solution)
 
-        for segment in self.begin_points[event.key]:
-
-            # Adds the segment to the living segments
-            # Checks the intersection with the added segment
-            living_segments.add(segment)
-
-            self.check_intersection(segment, living_segments, solution)
-
+class StreamedEvents(Events):
+    """
+    events read from a stream of endpoints events already sorted in sweep
+    order (see geo.bo_file.write_events) instead of being built from all the
+    segments.
+    segments are only created when the sweep reaches their creation event
+    and are forgotten by the events once destroyed.
+    """
 
-    def add_intersection(self, inter_point):
+    def __init__(self, records, solution=None):
         """
-        Adds the intersection point in the events.
+        records iterates on arrays of events records (see
+        geo.bo_file.read_events). new segments are added to the solution if
+        one is given.
         """
-        not_exist = not inter_point in self.begin_points and not inter_point in self.end_points
-        # Creates the entry in the hastable
-        if not inter_point in self.begin_points:
-            self.begin_points[inter_point] = []
-        if not inter_point in self.end_points:
-            self.end_points[inter_point] = []
-
-        # If the intersection does not exists
-        # Creates the intersection event and add it to the
-        # hashtables of segments
-        if not_exist:
-            self.event_list.add(Event(INTERSECTION, inter_point))
-
-
-    def check_intersection(self, segment, segments, solution):
+        super().__init__([])
+        self.records = (record for records_chunk in records
+                        for record in records_chunk.tolist())
+        self.next_record = next(self.records, None)
+        self.solution = solution
+        # created segments waiting for their destruction, by index
+        self.opened = dict()
+
+    def feed(self):
         """
-        check intersection for one segment and the living segments
+        reads the endpoints events until the next event to process is known.
         """
-        for inter_point, inter_segment in intersect_with(segment, segments):
-
-            # if point not in the past
-            if not intersection_is_correct(inter_point, segment, inter_segment):
-                continue
-
-            # If the event does not exists
-            self.add_intersection(inter_point)
-
-            # Adds the segments in the correct hashtables
-            for segment in [inter_segment, segment]:
+        while self.next_record is not None and \
+                (not self.event_list or
+                 (-self.next_record[0], -self.next_record[1]) <= self.event_list[0].order):
+            y, x, event_type, index, x_1, y_1, x_2, y_2 = self.next_record
+            point = Point([x, y])
+            if event_type == CREATION:
+                segment = Segment([Point([x_1, y_1]), Point([x_2, y_2])], index)
+                self.opened[index] = segment
+                if self.solution is not None:
+                    self.solution.add_segment(segment)
+                self.begin_points.setdefault(point, []).append(segment)
+            else:
+                segment = self.opened.pop(index)
+                self.end_points.setdefault(point, []).append(segment)
+            self.add_event(event_type, point)
+            self.next_record = next(self.records, None)
 
-                if segment not in self.end_points[inter_point]:
-                    self.end_points[inter_point].append(segment)
+    def isempty(self):
+        """
+        returns true is there are no more events in the structure
+        """
+        self.feed()
+        return not self.event_list
 
-                    if not inter_point in segment.endpoints:
-                        self.begin_points[inter_point].append(segment)
+    def pop(self):
+        """
+        removes and returns the next event.
+        """
+        self.feed()
+        return super().pop()
 
-            # Adding the solution
-            solution.add(inter_segment, inter_point)
-            solution.add(segment, inter_point)
+    def handle_event(self, event, living_segments, solution):
+        """
+        processes the event and forgets the segments ending on it.
+        """
+        super().handle_event(event, living_segments, solution)
+        self.begin_points.pop(event.key, None)
+        self.end_points.pop(event.key, None)
 
-def intersection_is_correct(point, seg1, seg2):
+def side(segment, point, tolerance=0.0):
     """
-    check if an intersection is correct
+    returns the position of the segment with respect to the point on the
+    sweeping line: negative on the left, zero if the segment passes through
+    the point (up to the tolerance, exactly in exact mode) and positive on
+    the right.
     """
-    #if point not in the past
-    if point in seg1.endpoints and point in seg2.endpoints:
-        return False
-
-    # Regular cases
-    return (point.coordinates[1] < Segment.current_point.coordinates[1]) or \
-           (point.coordinates[1] == Segment.current_point.coordinates[1] and \
-            point.coordinates[0] <= Segment.current_point.coordinates[0])
-
-
-def intersect_with(segment, living_segments):
+    if Segment.exact:
+        upper, lower = max(segment.endpoints), min(segment.endpoints)
+        if upper.coordinates[1] == lower.coordinates[1]:
+            # living horizontal segments always pass through the current point
+            return 0
+        return -orientation(upper, lower, point)
+
+    distance = segment.compute_key(point) - point.coordinates[0]
+    if abs(distance) <= tolerance:
+        return 0
+    return distance
+
+def add_crossings(point, crossing, solution):
     """
-    computes the intersection with the closest segments from segment
-    and iterates on the adjusted intersections with the segments involved
+    adds the point to all the segments crossing on it.
+    segments only touching parallel segments are not intersecting.
+    as parallelism is transitive (up to the tolerance), either all the
+    segments are parallel to the first one and none is crossing, or each
+    one crosses the first one or the first segment not parallel to it :
+    only two tests are needed per segment.
     """
-    # Searching for the current segment in the living segments
-    # and searching for its nearest neighbours
-    for neighbour in neighbours(segment, living_segments):
-        if neighbour is None:
-            continue
-        inter_point = segment.intersection_with(neighbour)
-
-        # if there's an intersection
-        if inter_point is not None:
-            inter_point = Segment.adjuster.hash_point(inter_point)
-            yield inter_point, neighbour
-
-def neighbours(segment, segments):
+    reference = crossing[0]
+    other = next((segment for segment in crossing
+                  if reference.line_intersection_with(segment) is not None), None)
+    if other is None:
+        return
+    for segment in crossing:
+        if segment is reference or segment is other or \
+           segment.line_intersection_with(reference) is not None or \
+           segment.line_intersection_with(other) is not None:
+            solution.add(segment, point)
+
+def add_red_blue_crossings(point, segments, others, solution):
     """
-    yields the neighbour segments of segment in segments
+    adds the point to the segments crossing one of the others on it (with
+    two tests per segment, see add_crossings).
     """
-    segment_index = None
-    right, left = None, None
-    # segment_index = segments.index(segment)
-    for index, seg in enumerate(segments):
-        if seg is segment:
-            segment_index = index
-    if segment_index is not None:
-        if segment_index < len(segments)-1:
-            right = segments[segment_index + 1]
-        if segment_index > 0:
-            left = segments[segment_index - 1]
-    return [left, right]
+    reference = others[0]
+    other = next((other for other in others
+                  if reference.line_intersection_with(other) is not None), None)
+    for segment in segments:
+        if segment.line_intersection_with(reference) is not None or \
+           (other is not None and segment.line_intersection_with(other) is not None):
+            solution.add(segment, point)
 
 def events_init_test():
     """
@@ -295,20 +470,44 @@ def intersection_test():
     events = Events([seg1, seg2])
     print("events:", events)
 
-    Segment.current_point = Point([2.0, 2.0])
-    living_segments = SortedList()
-    living_segments.add(seg1)
-    living_segments.add(seg2)
+    living_segments = LivingSegments()
+    solution = Solution([seg1, seg2])
 
     while not events.isempty():
-        current_event = events.event_list.pop(0)
-        #print("current event: ", current_event.key)
-        if current_event.key in events.begin_points:
-            for segment in events.begin_points[current_event.key]:
-                print("segment :", segment)
-                print([point for point in intersect_with(segment,
-                                                         living_segments)])
+        current_event = events.pop()
+        Segment.current_point = current_event.key
+        events.handle_event(current_event, living_segments, solution)
+        print("current event: ", current_event.key, "living:", list(living_segments))
 
+    print("intersections:", list(solution.intersection_points()))
+    print("-----------------------------------------\n")
+
+def rounded_intersection_test():
+    """
+    test two neighbours crossing just below an event point, the intersection
+    being rounded on the sweeping line on the right of the point
+    """
+    print("\n---------Rounded intersection test---------")
+    for exact in (False, True):
+        Segment.adjuster, Segment.exact = CoordinatesHash(), exact
+        seg1, seg2 = (Segment([Segment.adjuster.hash_point(Point([x_1, y_1])),
+                               Segment.adjuster.hash_point(Point([x_2, y_2]))], index)
+                      for index, (x_1, y_1, x_2, y_2) in enumerate((
+                          (0.7995746286488908, 0.7578759510347725,
+                           0.5690762068509966, 0.071139808032883),
+                          (0.6380763853533384, 0.10976868768482018,
+                           0.5822779479570703, 0.11059527132594116))))
+        events = Events([seg1, seg2])
+        living_segments = LivingSegments()
+        solution = Solution([seg1, seg2])
+        while not events.isempty():
+            current_event = events.pop()
+            Segment.current_point = current_event.key
+            events.handle_event(current_event, living_segments, solution)
+        expected = Segment.adjuster.hash_point(seg1.intersection_with(seg2))
+        print("exact:", exact, "intersections:", list(solution.intersection_points()))
+        assert list(solution.intersection_points()) == [expected]
+    Segment.adjuster, Segment.exact = CoordinatesHash(), False
     print("-----------------------------------------\n")
 
 if __name__ == "__main__":
@@ -317,3 +516,4 @@ if __name__ == "__main__":
     """
     events_init_test()
     intersection_test()
+    rounded_intersection_test()
@@ -0,0 +1,253 @@
+"""
+vectorized .bo files loading (requires numpy).
+a .bo file is a sequence of segments, each one stored as four
+doubles: x1 y1 x2 y2.
+
+large files can also be streamed in chunks of segments (read_chunks) and
+their endpoints events sorted on disk (write_events) for the sweep
+(see events.StreamedEvents).
+"""
+import os
+import tempfile
+from heapq import merge
+import numpy as np
+from geo.point import Point
+from geo.segment import Segment
+from geo.coordinates_hash import CoordinatesHash
+
+# number of segments (or events) read at once when streaming
+CHUNK_SIZE = 1 << 16
+# maximal number of sorted runs merged at once
+MERGE_WIDTH = 64
+
+# endpoints events: the event point, the type (0 for creation,
+# 1 for destruction) and the segment (index and coordinates)
+EVENT_DTYPE = np.dtype([("y", "<f8"), ("x", "<f8"), ("type", "i1"), ("index", "<i8"),
+                        ("x_1", "<f8"), ("y_1", "<f8"), ("x_2", "<f8"), ("y_2", "<f8")])
+
+def load_coordinates(filename):
+    """
+    memory maps given .bo file.
+    returns a (n, 4) array of raw coordinates (x1, y1, x2, y2).
+    """
+    try:
+        coordinates = np.memmap(filename, dtype=np.float64, mode="r")
+    except ValueError:
+        # mmap cannot map empty files
+        coordinates = np.empty(0, dtype=np.float64)
+    return coordinates.reshape(-1, 4)
+
+def snap_coordinates(coordinates, adjuster):
+    """
+    adjusts a (n, 4) array of coordinates with the adjuster, in the order
+    of the file (as loading points one by one would do).
+    returns the new array.
+    """
+    snapped = np.empty(coordinates.shape, dtype=np.float64)
+    for index in range(2):
+        columns = [index, index + 2]
+        # rows order is kept : (x1, x2) of first segment, then second one...
+        snapped[:, columns] = adjuster.hash_array(coordinates[:, columns], index)
+    return snapped
+
+class LazySegments:
+    """
+    read only sequence of segments built from an array of coordinates.
+    each segment is only created when accessed (and then kept, so that
+    the same object is always returned for a given index).
+    segments are indexed from first_index on.
+    """
+    def __init__(self, coordinates, first_index=0):
+        self.coordinates = coordinates
+        self.first_index = first_index
+        self.segments = [None] * len(coordinates)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __getitem__(self, index):
+        segment = self.segments[index]
+        if segment is None:
+            x_1, y_1, x_2, y_2 = self.coordinates[index].tolist()
+            segment = Segment([Point([x_1, y_1]), Point([x_2, y_2])],
+                              self.first_index + index)
+            self.segments[index] = segment
+        return segment
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+def load_segments(filename, adjuster=None):
+    """
+    loads given .bo file with numpy (and given adjuster, a new
+    CoordinatesHash by default).
+    returns the adjuster and a lazy sequence of adjusted segments.
+    """
+    if adjuster is None:
+        adjuster = CoordinatesHash()
+    coordinates = snap_coordinates(load_coordinates(filename), adjuster)
+    return adjuster, LazySegments(coordinates)
+
+def load_red_blue(red_filename, blue_filename, adjuster=None):
+    """
+    loads two .bo files as red and blue segments (with given adjuster, a
+    new CoordinatesHash by default, adjusting the red file first).
+    returns the adjuster and the lazy sequences of red and blue segments,
+    blue segments being indexed after the red ones.
+    """
+    adjuster, red = load_segments(red_filename, adjuster)
+    coordinates = snap_coordinates(load_coordinates(blue_filename), adjuster)
+    return adjuster, red, LazySegments(coordinates, len(red))
+
+def _read_exactly(stream, size):
+    """
+    reads size bytes from the binary stream (less only at the end).
+    """
+    data = stream.read(size)
+    if data is None or len(data) == size or not data:
+        return data or b""
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        data = stream.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+def read_chunks(source, chunk_size=CHUNK_SIZE):
+    """
+    iterates on the raw coordinates of a .bo file (path or binary stream)
+    by (at most chunk_size, 4) arrays, only one chunk being in memory.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb") as stream:
+            yield from read_chunks(stream, chunk_size)
+        return
+    while True:
+        data = _read_exactly(source, 32 * chunk_size)
+        if len(data) % 32:
+            raise ValueError("truncated .bo file")
+        if not data:
+            return
+        yield np.frombuffer(data, dtype="<f8").reshape(-1, 4)
+
+def read_segment_chunks(source, chunk_size=CHUNK_SIZE, adjuster=None):
+    """
+    iterates on the segments of a .bo file (path or binary stream) by lists
+    of at most chunk_size segments, indexed on their position in the file.
+    coordinates are adjusted in the order of the file if an adjuster is
+    given (the adjuster grows with the distinct coordinates).
+    """
+    start = 0
+    for coordinates in read_chunks(source, chunk_size):
+        if adjuster is not None:
+            coordinates = snap_coordinates(coordinates, adjuster)
+        yield [Segment([Point([x_1, y_1]), Point([x_2, y_2])], start + position)
+               for position, (x_1, y_1, x_2, y_2) in enumerate(coordinates.tolist())]
+        start += len(coordinates)
+
+def _chunk_events(coordinates, start):
+    """
+    returns the sorted endpoints events of a chunk of segments.
+    """
+    count = len(coordinates)
+    x_1, y_1, x_2, y_2 = coordinates.T
+    # the upper point (greatest y, then greatest x) creates the segment
+    first_upper = (y_1 > y_2) | ((y_1 == y_2) & (x_1 >= x_2))
+    events = np.empty(2 * count, dtype=EVENT_DTYPE)
+    events["y"] = np.concatenate((np.where(first_upper, y_1, y_2),
+                                  np.where(first_upper, y_2, y_1)))
+    events["x"] = np.concatenate((np.where(first_upper, x_1, x_2),
+                                  np.where(first_upper, x_2, x_1)))
+    events["type"] = np.repeat([0, 1], count)
+    events["index"] = np.tile(np.arange(start, start + count), 2)
+    for name, column in zip(("x_1", "y_1", "x_2", "y_2"), (x_1, y_1, x_2, y_2)):
+        events[name] = np.tile(column, 2)
+    # sweep order : from top to bottom, from right to left, creations first
+    return events[np.lexsort((events["type"], -events["x"], -events["y"]))]
+
+def _event_order(event):
+    """
+    key of an event record in the sweep.
+    """
+    return -event[0], -event[1], event[2]
+
+def write_events(source, destination=None, adjuster=None, chunk_size=CHUNK_SIZE):
+    """
+    pre-pass for the sweep on files larger than memory : writes the endpoints
+    events of the .bo file (path or binary stream) sorted in sweep order
+    to destination (a new temporary file by default) and returns its path.
+    each chunk is sorted in memory and the sorted runs are then merged
+    (in several passes if there are many), so that only about chunk_size
+    events are in memory at once.
+    coordinates are adjusted in the order of the file if an adjuster is
+    given.
+    """
+    if destination is None:
+        descriptor, destination = tempfile.mkstemp(suffix=".events")
+        os.close(descriptor)
+    with tempfile.TemporaryDirectory() as runs_directory:
+        runs, start = [], 0
+        for coordinates in read_chunks(source, chunk_size):
+            if adjuster is not None:
+                coordinates = snap_coordinates(coordinates, adjuster)
+            runs.append(os.path.join(runs_directory, "{}.events".format(len(runs))))
+            _chunk_events(coordinates, start).tofile(runs[-1])
+            start += len(coordinates)
+
+        # merging the runs by groups of at most MERGE_WIDTH, until one is
+        # left
+        merge_pass = 0
+        while len(runs) > MERGE_WIDTH:
+            merge_pass += 1
+            merged = []
+            for first in range(0, len(runs), MERGE_WIDTH):
+                merged.append(os.path.join(runs_directory,
+                                           "{}_{}.events".format(merge_pass, len(merged))))
+                _merge_runs(runs[first:first + MERGE_WIDTH], merged[-1], chunk_size)
+                for run in runs[first:first + MERGE_WIDTH]:
+                    os.remove(run)
+            runs = merged
+        _merge_runs(runs, destination, chunk_size)
+    return destination
+
+def _merge_runs(runs, destination, chunk_size):
+    """
+    merges sorted events files into destination, holding at most about
+    chunk_size events in memory : each run is read by blocks of
+    chunk_size // len(runs) events and the output is written by chunks.
+    """
+    block_size = max(1, chunk_size // max(1, len(runs)))
+    with open(destination, "wb") as events_file:
+        buffer = np.empty(chunk_size, dtype=EVENT_DTYPE)
+        size = 0
+        runs_events = (_records(run, block_size) for run in runs)
+        for event in merge(*runs_events, key=_event_order):
+            buffer[size] = event
+            size += 1
+            if size == chunk_size:
+                buffer.tofile(events_file)
+                size = 0
+        buffer[:size].tofile(events_file)
+
+def read_events(filename, chunk_size=CHUNK_SIZE):
+    """
+    iterates on the events written by write_events by arrays of at most
+    chunk_size events.
+    """
+    with open(filename, "rb") as events_file:
+        while True:
+            events = np.fromfile(events_file, dtype=EVENT_DTYPE, count=chunk_size)
+            if not events.size:
+                return
+            yield events
+
+def _records(filename, chunk_size):
+    """
+    iterates on the events of the file as tuples.
+    """
+    for events in read_events(filename, chunk_size):
+        yield from events.tolist()
@@ -2,6 +2,7 @@
 adjust points coordinates in O(1).
 (also hashes together nearby points)
 """
+from math import floor
 from geo.point import Point
 
 # how much to we adjust ?
@@ -63,6 +64,26 @@ class CoordinatesHash:
         self.fast_hash.add(new_point)
         return new_point
 
+    def hash_coordinate(self, coordinate, index=0):
+        """
+        add 1 coordinate (given index) to the hash, returning the adjusted
+        coordinate.
+        """
+        return self.__hash_coordinate(coordinate, index)
+
+    def hash_array(self, values, index=0):
+        """
+        add a numpy array of coordinates (given index) to the hash, in order,
+        returning the array of adjusted coordinates.
+        only the distinct values are formatted.
+        """
+        import numpy as np
+        values = np.asarray(values, dtype=np.float64)
+        precision = self.precision
+        return _hash_array(self.hashes, index, values, values.ravel(),
+                           lambda coordinate: (_coordinate_key(coordinate, precision),
+                                               _displaced_coordinate_key(coordinate, precision)))
+
     def __hash_coordinate(self, coordinate, index=0):
         """
         add 1 coordinate (given index) to the hash, adjusting it if needed.
@@ -77,3 +98,139 @@ class CoordinatesHash:
         self.hashes[2*index][key] = coordinate
         self.hashes[2*index+1][displaced_key] = coordinate
         return coordinate
+
+class GridHash:
+    """
+    a GridHash provides the same service as a CoordinatesHash (same
+    interface, same guarantee) but coordinates are quantised to integer
+    cells instead of being formatted to strings.
+
+    each coordinate c falls in cell floor(c * 10**wanted_precision) and in
+    displaced cell floor(c * 10**wanted_precision + 0.5). two coordinates
+    closer than 0.5*10**-wanted_precision always share one of them.
+    """
+    def __init__(self, wanted_precision=PRECISION, dimension=2):
+        self.hashes = [{} for _ in range(2*dimension)]
+        self.precision = wanted_precision
+        self.scale = 10.0**wanted_precision
+        self.fast_hash = set()
+
+    def hash_point(self, point):
+        """
+        add a point to the hash, returning new point with adjusted coordinates.
+        """
+        if point in self.fast_hash:
+            return point
+
+        new_point = Point([self.hash_coordinate(c, i) for i, c in enumerate(point.coordinates)])
+        self.fast_hash.add(new_point)
+        return new_point
+
+    def hash_coordinate(self, coordinate, index=0):
+        """
+        add 1 coordinate (given index) to the hash, returning the adjusted
+        coordinate.
+        """
+        scaled = coordinate * self.scale
+        return self.hash_cells(coordinate, floor(scaled), floor(scaled + 0.5), index)
+
+    def hash_cells(self, coordinate, cell, displaced_cell, index=0):
+        """
+        add 1 coordinate with its precomputed cells to the hash.
+        """
+        cells = self.hashes[2*index]
+        if cell in cells:
+            return cells[cell]
+        displaced_cells = self.hashes[2*index+1]
+        if displaced_cell in displaced_cells:
+            return displaced_cells[displaced_cell]
+
+        cells[cell] = coordinate
+        displaced_cells[displaced_cell] = coordinate
+        return coordinate
+
+    def hash_array(self, values, index=0):
+        """
+        add a numpy array of coordinates (given index) to the hash, in order,
+        returning the array of adjusted coordinates.
+        cells are computed at once and only the distinct (cell, displaced cell)
+        pairs are hashed.
+        """
+        import numpy as np
+        values = np.asarray(values, dtype=np.float64)
+        scaled = values.ravel() * self.scale
+        cells = np.floor(scaled).astype(np.int64)
+        displaced_cells = np.floor(scaled + 0.5).astype(np.int64)
+        # a displaced cell is the cell or the next one : pairs fit in one integer
+        return _hash_array(self.hashes, index, values, 2 * cells + (displaced_cells - cells),
+                           lambda coordinate: (floor(coordinate * self.scale),
+                                               floor(coordinate * self.scale + 0.5)))
+
+def _hash_array(hashes, index, values, groups, keys):
+    """
+    hashes a numpy array of coordinates in order, as hashing them one by one
+    would do, returning the array of adjusted coordinates.
+    values of a same group (numpy array of integers or floats) have the same
+    (key, displaced key), given by keys(coordinate) : each group is only
+    looked up once, in order of first appearance.
+    """
+    import numpy as np
+    shape, values = values.shape, values.ravel()
+    if not values.size:
+        return values.reshape(shape)
+    _, first, inverse = np.unique(groups, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind="stable")
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    inverse, first = ranks[inverse.ravel()], first[order]
+
+    keys_hash, displaced_hash = hashes[2*index], hashes[2*index+1]
+    adjusted, later = np.empty(len(first)), np.empty(len(first))
+    switches = np.full(len(first), values.size)
+    inserted, displaced = {}, []
+    for group, coordinate in enumerate(values[first].tolist()):
+        key, displaced_key = keys(coordinate)
+        if key in keys_hash:
+            coordinate = keys_hash[key]
+        elif displaced_key in displaced_hash:
+            coordinate = displaced_hash[displaced_key]
+            displaced.append((group, key))
+        else:
+            keys_hash[key] = coordinate
+            displaced_hash[displaced_key] = coordinate
+            inserted[key] = first[group]
+        adjusted[group] = coordinate
+
+    # values found through their displaced key are found through their key
+    # once an other value is inserted with it
+    for group, key in displaced:
+        if key in inserted:
+            switches[group], later[group] = inserted[key], keys_hash[key]
+    hashed = adjusted[inverse]
+    switched = np.arange(values.size) > switches[inverse]
+    hashed[switched] = later[inverse[switched]]
+    return hashed.reshape(shape)
+
+def hash_array_test():
+    """
+    test that hashing arrays gives the same coordinates and hashes as hashing
+    their values one by one, on random clustered values.
+    """
+    import numpy as np
+    print("\n------------Hash array test------------")
+    print(GridHash().hash_array(np.array([6.1e-6, 5.7e-6, 5.2e-6, 5.8e-6])))
+    generator = np.random.default_rng(0)
+    for _ in range(100):
+        values = generator.random(5)[generator.integers(0, 5, 200)] + \
+            generator.normal(0.0, 10.0**-PRECISION, 200)
+        values[generator.integers(0, 200, 40)] = values[generator.integers(0, 200, 40)]
+        for hash_class in (CoordinatesHash, GridHash):
+            scalar, batch = hash_class(), hash_class()
+            expected = [scalar.hash_coordinate(value) for value in values.tolist()]
+            assert batch.hash_array(values.reshape(-1, 2)).ravel().tolist() == expected
+            assert batch.hashes == scalar.hashes
+    print("ok")
+    print("---------------------------------------\n")
+
+if __name__ == "__main__":
+    hash_array_test()
@@ -1,5 +1,5 @@
 """
-points (any dimension).
+points (2d).
 """
 from math import sqrt
 from geo.quadrant import Quadrant
@@ -7,7 +7,7 @@ from geo.quadrant import Quadrant
 
 class Point:
     """
-    a point is defined as a vector of any given dimension.
+    a point is defined as an immutable vector of two coordinates.
 
     for example:
 
@@ -19,27 +19,36 @@ class Point:
 
     distance = point1.distance_to(point2)
     """
+    __slots__ = ("coordinates", "hash")
+
     def __init__(self, coordinates):
         """
         build new point using an array of coordinates.
         """
-        self.coordinates = coordinates
+        coordinates = tuple(coordinates)
+        object.__setattr__(self, "coordinates", coordinates)
+        object.__setattr__(self, "hash", hash(coordinates))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("points are immutable")
+
+    def __reduce__(self):
+        return (Point, (self.coordinates,))
 
     def copy(self):
         """
         return copy of given point.
         """
-        return Point(list(self.coordinates))
+        return Point(self.coordinates)
 
     def distance_to(self, other):
         """
         euclidean distance between two points.
         """
-        total = 0
-        for c_1, c_2 in zip(self.coordinates, other.coordinates):
-            diff = c_1 - c_2
-            total += diff * diff
-        return sqrt(total)
+        x_1, y_1 = self.coordinates
+        x_2, y_2 = other.coordinates
+        diff_x, diff_y = x_1 - x_2, y_1 - y_2
+        return sqrt(diff_x * diff_x + diff_y * diff_y)
 
     def bounding_quadrant(self):
         """
@@ -72,40 +81,50 @@ class Point:
         """
         compare two points
         """
-        return (self.coordinates[1], self.coordinates[0]) < (other.coordinates[1], other.coordinates[0])
+        x_1, y_1 = self.coordinates
+        x_2, y_2 = other.coordinates
+        return y_1 < y_2 or (y_1 == y_2 and x_1 < x_2)
 
     def __gt__(self, other):
         """
         compare two points
         """
-        return (not self < other) and not self == other
+        x_1, y_1 = self.coordinates
+        x_2, y_2 = other.coordinates
+        return y_1 > y_2 or (y_1 == y_2 and x_1 > x_2)
 
     def __hash__(self):
-        return hash(tuple(self.coordinates))
+        return self.hash
 
     def __add__(self, other):
         """
         addition operator. (useful for translations)
         """
-        return Point([i + j for i, j in zip(self.coordinates, other.coordinates)])
+        x_1, y_1 = self.coordinates
+        x_2, y_2 = other.coordinates
+        return Point((x_1 + x_2, y_1 + y_2))
 
     def __sub__(self, other):
         """
         substraction operator. (useful for translations)
         """
-        return Point([i - j for i, j in zip(self.coordinates, other.coordinates)])
+        x_1, y_1 = self.coordinates
+        x_2, y_2 = other.coordinates
+        return Point((x_1 - x_2, y_1 - y_2))
 
     def __mul__(self, factor):
         """
         multiplication by scalar operator. (useful for scaling)
         """
-        return Point([c*factor for c in self.coordinates])
+        x_1, y_1 = self.coordinates
+        return Point((x_1 * factor, y_1 * factor))
 
     def __truediv__(self, factor):
         """
         division by scalar operator. (useful for scaling)
         """
-        return Point([c/factor for c in self.coordinates])
+        x_1, y_1 = self.coordinates
+        return Point((x_1 / factor, y_1 / factor))
 
     def __str__(self):
         """
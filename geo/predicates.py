@@ -0,0 +1,146 @@
+"""
+exact geometric predicates (2d).
+signs are first computed with floats and an error bound, the exact
+computation with fractions is only done when the sign is uncertain.
+"""
+from fractions import Fraction
+from geo.point import Point
+
+# relative error of a floating point operation
+EPSILON = 2.0**-53
+# error bound of a floating point 2x2 determinant (see Shewchuk)
+DETERMINANT_BOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+# maximal error accepted on the floating point parameter of an
+# intersection point along its segment (the point is then within about
+# ALPHA_ACCURACY times the segment length of the exact one)
+ALPHA_ACCURACY = 2.0**-40
+
+
+def _sign(value):
+    """
+    returns -1, 0 or 1 according to the sign of value.
+    """
+    return (value > 0) - (value < 0)
+
+def cross_product_sign(point1, point2, point3, point4):
+    """
+    returns the sign of the cross product between vectors point1->point2
+    and point3->point4.
+    """
+    x_1, y_1 = point1.coordinates
+    x_2, y_2 = point2.coordinates
+    x_3, y_3 = point3.coordinates
+    x_4, y_4 = point4.coordinates
+    left = (x_2 - x_1) * (y_4 - y_3)
+    right = (y_2 - y_1) * (x_4 - x_3)
+    determinant = left - right
+    bound = DETERMINANT_BOUND * (abs(left) + abs(right))
+    if determinant > bound:
+        return 1
+    if -determinant > bound:
+        return -1
+
+    # uncertain sign : computing with fractions
+    x_1, y_1, x_2, y_2, x_3, y_3, x_4, y_4 = \
+        (Fraction(c) for c in (x_1, y_1, x_2, y_2, x_3, y_3, x_4, y_4))
+    return _sign((x_2 - x_1) * (y_4 - y_3) - (y_2 - y_1) * (x_4 - x_3))
+
+def orientation(point1, point2, point3):
+    """
+    returns 1 if point3 is on the left of the line (point1, point2), -1 if
+    it is on its right and 0 if the three points are aligned.
+    """
+    return cross_product_sign(point1, point2, point1, point3)
+
+def in_box(point1, point2, point3):
+    """
+    is point3 inside the bounding box of point1 and point2 ?
+    """
+    for c_1, c_2, c_3 in zip(point1.coordinates, point2.coordinates, point3.coordinates):
+        if c_3 < min(c_1, c_2) or c_3 > max(c_1, c_2):
+            return False
+    return True
+
+def contains(segment, point):
+    """
+    is the point exactly on the segment ?
+    """
+    point1, point2 = segment.endpoints
+    return orientation(point1, point2, point) == 0 and in_box(point1, point2, point)
+
+def aligned(segment1, segment2):
+    """
+    are the two segments exactly on the same line ?
+    """
+    point1, point2 = segment1.endpoints
+    return all(orientation(point1, point2, point) == 0 for point in segment2.endpoints)
+
+def are_parallel(segment1, segment2):
+    """
+    are the two segments exactly parallel ?
+    """
+    return cross_product_sign(*segment1.endpoints, *segment2.endpoints) == 0
+
+def line_intersection(segment1, segment2):
+    """
+    returns the intersection point of the lines passing through the two
+    segments (None if they are parallel), rounded to floats.
+    the floating point computation is only kept when its error bound is
+    small enough.
+    """
+    if are_parallel(segment1, segment2):
+        return None
+
+    x_1, y_1, x_2, y_2 = (*segment1.endpoints[0].coordinates,
+                          *segment1.endpoints[1].coordinates)
+    x_3, y_3, x_4, y_4 = (*segment2.endpoints[0].coordinates,
+                          *segment2.endpoints[1].coordinates)
+    # intersection = start1 + alpha * direction1, alpha being a quotient of
+    # two determinants
+    left, right = (x_2 - x_1) * (y_4 - y_3), (y_2 - y_1) * (x_4 - x_3)
+    denominator = left - right
+    denominator_bound = DETERMINANT_BOUND * (abs(left) + abs(right))
+    if abs(denominator) > denominator_bound:
+        numerator_left, numerator_right = (x_3 - x_1) * (y_4 - y_3), (y_3 - y_1) * (x_4 - x_3)
+        numerator_bound = DETERMINANT_BOUND * (abs(numerator_left) + abs(numerator_right))
+        alpha = (numerator_left - numerator_right) / denominator
+        # first order error of alpha
+        if numerator_bound + abs(alpha) * denominator_bound <= ALPHA_ACCURACY * abs(denominator):
+            return Point([x_1 + (x_2 - x_1) * alpha, y_1 + (y_2 - y_1) * alpha])
+
+    # inaccurate floating point alpha : computing with fractions
+    x_1, y_1, x_2, y_2, x_3, y_3, x_4, y_4 = \
+        (Fraction(c) for c in (x_1, y_1, x_2, y_2, x_3, y_3, x_4, y_4))
+    alpha = ((x_3 - x_1) * (y_4 - y_3) - (y_3 - y_1) * (x_4 - x_3)) / \
+        ((x_2 - x_1) * (y_4 - y_3) - (y_2 - y_1) * (x_4 - x_3))
+    return Point([float(x_1 + (x_2 - x_1) * alpha), float(y_1 + (y_2 - y_1) * alpha)])
+
+def intersection(segment1, segment2):
+    """
+    returns the intersection point of two segments if they intersect on
+    exactly one point (None otherwise).
+    the decision is exact, the point is rounded to floats unless it is an
+    endpoint.
+    """
+    start1, end1 = segment1.endpoints
+    start2, end2 = segment2.endpoints
+    orientation_start2 = orientation(start1, end1, start2)
+    orientation_end2 = orientation(start1, end1, end2)
+    if orientation_start2 == orientation_end2:
+        # same side or aligned segments
+        return None
+    orientation_start1 = orientation(start2, end2, start1)
+    orientation_end1 = orientation(start2, end2, end1)
+    if orientation_start1 == orientation_end1:
+        return None
+
+    # touching on an endpoint
+    if orientation_start2 == 0:
+        return start2
+    if orientation_end2 == 0:
+        return end2
+    if orientation_start1 == 0:
+        return start1
+    if orientation_end1 == 0:
+        return end1
+    return line_intersection(segment1, segment2)
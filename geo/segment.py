@@ -1,11 +1,23 @@
 """
 segment between two points.
 """
-from math import atan, pi
-import struct
-from geo.point import Point
 from geo.quadrant import Quadrant
 from geo.coordinates_hash import CoordinatesHash
+from geo import predicates
+
+# lines with a smaller direction cross product are taken as parallel
+PARALLEL_LIMIT = 0.000001
+# points whose distances to the endpoints exceed the length by less than this
+# are taken as inside the segment
+CONTAINS_LIMIT = 0.000001
+
+def contains_margin(length):
+    """
+    returns the margin around a segment of given length (a float or a numpy
+    array of lengths) holding all the points accepted by Segment.contains.
+    """
+    # accepted points are in an ellipse around the segment
+    return (length * CONTAINS_LIMIT) ** 0.5 + CONTAINS_LIMIT
 
 class Segment:
     """
@@ -26,52 +38,78 @@ class Segment:
         intersection = segment1.intersection_with(segment2)
 
     """
+    __slots__ = ("endpoints", "index", "living_node", "key_point", "key_abs", "direction")
+
     # Class attribute for the current point
     current_point = None
 
     # Adjuster usable with all segments (when computing key)
     adjuster = CoordinatesHash()
 
+    # Predicates mode: exact predicates (see geo.predicates) instead of
+    # floating point computations with tolerances
+    exact = False
+
     def __init__(self, points, index=0):
         """
         create a segment from an array of two points.
         """
-        self.endpoints = points
+        self.endpoints = tuple(points)
         self.index = index
+        # handle in the living segments (None if not living)
+        self.living_node = None
+        # key memorised for the point it was computed on
+        self.key_point = None
+        self.key_abs = None
+        self.direction = None
+
     def __lt__(self, other):
         """
-        compares two segments
+        compares two segments on the sweeping line (and below the current
+        point when they cross on it)
         """
         key1 = self.compute_key(self.current_point)
         key2 = other.compute_key(other.current_point)
-        return key1 < key2
+        if key1 != key2:
+            return key1 < key2
+        return compare_slopes(self, other) < 0
 
     def compute_key(self, current_point):
         """
-        computes the key for the bo algorithm
-        """
-        point1 = self.endpoints[0]
-        point2 = self.endpoints[1]
-        const = 0.0
-        diff = point2.coordinates[0] - point1.coordinates[0]
-
-        key_abs, key_ord = sweep_intersection(self, current_point)
-
-        # Sign of the angle based on the position of the current point
-        epsilon = 1
-        if current_point.coordinates[0] > key_abs:
-            epsilon = -1
-
-        if current_point.coordinates[1] < key_ord:
-            epsilon = -1
-
-        if diff == 0:
-            return (key_abs, epsilon*pi/2)
-        if diff < 0:
-            const = pi
-        return (key_abs, epsilon*(const + \
-            atan((point2.coordinates[1] - point1.coordinates[1])/(diff))))
-
+        computes the key for the bo algorithm: the abscissa of the
+        intersection beetween the sweeping line and the segment.
+        the key is kept until the current point moves.
+        """
+        if self.key_point is current_point:
+            return self.key_abs
+
+        (x_1, y_1), (x_2, y_2) = self.endpoints[0].coordinates, self.endpoints[1].coordinates
+        x_current, y_current = current_point.coordinates
+        if y_1 == y_2:
+            # horizontal segments are on the current point
+            key_abs = x_current
+        elif y_current == y_1:
+            key_abs = x_1
+        elif y_current == y_2:
+            key_abs = x_2
+        else:
+            key_abs = x_1 + (y_current - y_1) * (x_2 - x_1) / (y_2 - y_1)
+
+        self.key_point = current_point
+        self.key_abs = key_abs
+        return key_abs
+
+    def sweep_direction(self):
+        """
+        returns the direction (abscissa variation, height) of the segment
+        from its upper endpoint to its lower one.
+        """
+        if self.direction is None:
+            upper = max(self.endpoints)
+            lower = min(self.endpoints)
+            self.direction = (lower.coordinates[0] - upper.coordinates[0],
+                              upper.coordinates[1] - lower.coordinates[1])
+        return self.direction
 
     def copy(self):
         """
@@ -112,6 +150,8 @@ class Segment:
         intersect two 2d segments.
         only return point if included on the two segments.
         """
+        if self.exact:
+            return predicates.intersection(self, other)
         i = self.line_intersection_with(other)
         if i is None:
             return  # parallel lines
@@ -123,14 +163,16 @@ class Segment:
         """
         return point intersecting with the two lines passing through
         the segments.
-        none if lines are almost parallel.
+        none if lines are almost parallel (exactly parallel in exact mode).
         """
+        if self.exact:
+            return predicates.line_intersection(self, other)
         # solve following system :
         # intersection = start of self + alpha * direction of self
         # intersection = start of other + beta * direction of other
         directions = [s.endpoints[1] - s.endpoints[0] for s in (self, other)]
         denominator = directions[0].cross_product(directions[1])
-        if abs(denominator) < 0.000001:
+        if abs(denominator) < PARALLEL_LIMIT:
             # almost parallel lines
             return
         start_diff = other.endpoints[0] - self.endpoints[0]
@@ -142,10 +184,13 @@ class Segment:
         is given point inside us ?
         be careful, determining if a point is inside a segment is a difficult problem
         (it is in fact a meaningless question in most cases).
-        you might get wrong results for points extremely near endpoints.
+        you might get wrong results for points extremely near endpoints
+        (unless in exact mode).
         """
+        if self.exact:
+            return predicates.contains(self, possible_point)
         distance = sum(possible_point.distance_to(p) for p in self.endpoints)
-        return abs(distance - self.length()) < 0.000001
+        return abs(distance - self.length()) < CONTAINS_LIMIT
 
     def __str__(self):
         return "Segment([" + str(self.endpoints[0]) + ", " + \
@@ -155,40 +200,21 @@ class Segment:
         return "Segment[" + repr(self.endpoints[0]) + ", " + \
             repr(self.endpoints[1]) + "]"
 
-def sweep_intersection(segment, current_point):
-    """
-    computes and returns the abscissa of the intersection beetween the
-    sweeping line and the segment.
-    """
-    # Creates a segment that corresponds to the sweeping line around segment
-    sweep = Segment([Point([0, current_point.coordinates[1]]),
-                     Point([1, current_point.coordinates[1]])])
-    key_point = segment.line_intersection_with(sweep)
-
-
-    # The key_point is None if segment is horizontal
-    if key_point is not None:
-        key_point = Segment.adjuster.hash_point(key_point)
-        return key_point.coordinates
-    else:
-        return current_point.coordinates
-
-def load_segments(filename):
+def compare_slopes(segment1, segment2):
     """
-    loads given .bo file.
-    returns a vector of segments.
+    compares the directions of two segments crossing on the current point:
+    returns a negative number if segment1 is on the left of segment2 just
+    below the point, a positive one if it is on the right and zero if they
+    are parallel.
+    horizontal segments are processed from right to left, so they are
+    placed before all the other ones.
     """
-    coordinates_struct = struct.Struct('4d')
-    segments = []
-    adjuster = CoordinatesHash()
-
-    with open(filename, "rb") as bo_file:
-        packed_segment = bo_file.read(32)
-        while packed_segment:
-            coordinates = coordinates_struct.unpack(packed_segment)
-            raw_points = [Point(coordinates[0:2]), Point(coordinates[2:])]
-            adjusted_points = [adjuster.hash_point(p) for p in raw_points]
-            segments.append(Segment(adjusted_points))
-            packed_segment = bo_file.read(32)
-
-    return adjuster, segments
+    width1, height1 = segment1.sweep_direction()
+    width2, height2 = segment2.sweep_direction()
+    if height1 == 0 or height2 == 0:
+        return height1 - height2
+    if Segment.exact:
+        return -predicates.cross_product_sign(max(segment1.endpoints), min(segment1.endpoints),
+                                              max(segment2.endpoints), min(segment2.endpoints))
+    # sign of the cross product of the directions
+    return width1 * height2 - width2 * height1
@@ -1,12 +1,21 @@
 """
 graphical display system.
 save objects as svg files and view them in terminology
+(svg files are written while iterating on the objects, without keeping
+their svg strings)
 """
 import os
 import getpass
+import struct
+import tempfile
 from itertools import cycle
 from geo.quadrant import Quadrant
+from geo.point import Point
+from geo.segment import Segment
 
+# item spilled by write_svg: x, y, extent (see _place) and size of the svg
+# string which follows
+SPILLED_ITEM = struct.Struct("<dddq")
 
 class Displayer:
     """
@@ -35,6 +44,31 @@ class Displayer:
         ratios = [a/b for a, b in zip(self.svg_dimensions, self.dimensions)]
         scale = min(ratios)
         self.stroke_size = 3/scale
+        # size of a pixel of the svg in the coordinates
+        self.pixel_size = 1/scale
+        # pixels already drawn (when decimating)
+        self.pixels = set()
+
+    def is_hidden(self, thing):
+        """
+        returns true if the thing is smaller than a pixel and its pixel is
+        already drawn (decimation).
+        """
+        return self.is_hidden_at(*_place(thing))
+
+    def is_hidden_at(self, x, y, extent):
+        """
+        returns true if a thing of given extent placed on (x, y) is smaller
+        than a pixel and its pixel is already drawn (decimation).
+        """
+        if extent >= self.pixel_size:
+            return False
+        pixel = (int((x - self.min_coordinates[0]) / self.pixel_size),
+                 int((y - self.min_coordinates[1]) / self.pixel_size))
+        if pixel in self.pixels:
+            return True
+        self.pixels.add(pixel)
+        return False
 
     def open_svg(self, filename):
         """
@@ -61,7 +95,7 @@ class Displayer:
         svg_file.write("</svg>\n")
         svg_file.close()
 
-def tycat(*things):
+def tycat(*things, quadrant=None, decimate=False):
     """
     graphically displays all objects given.
     each argument will be displayed in a different color.
@@ -71,6 +105,7 @@ def tycat(*things):
             * bounding_quadrant
             * svg_content
         or is an iterable on things implementing it.
+    see write_svg for the options.
     """
     print("[", Displayer.file_count, "]")
 
@@ -83,14 +118,129 @@ def tycat(*things):
     filename = "{}/{}.svg".format(directory, str(Displayer.file_count).zfill(5))
     Displayer.file_count += 1
 
-    size, svg_strings = compute_displays(things)
-    display = Displayer(size)
-    svg_file = display.open_svg(filename)
-    for string in svg_strings:
-        svg_file.write(string)
-    display.close_svg(svg_file)
+    write_svg(filename, things, quadrant, decimate)
     os.system("tycat {}".format(filename))
 
+def write_svg(filename, things, quadrant=None, decimate=False):
+    """
+    writes the things in an svg file, each one in a different color.
+    the bounding quadrant is computed in a first pass on the things
+    unless given, the svg strings are then written one by one.
+    things which can only be iterated once (generators) are iterated once:
+    during the first pass their svg strings are spilled in a temporary file
+    (with their places for the decimation) and copied afterwards.
+    if decimate is true, points and segments smaller than a pixel are only
+    drawn once per pixel.
+    """
+    things = list(things)
+    spilled = [None] * len(things)
+    with tempfile.TemporaryFile() as spill:
+        if quadrant is None:
+            quadrant = Quadrant.empty_quadrant(2)
+            for position, thing in enumerate(things):
+                items = _bounded(_items(thing), quadrant)
+                if _iterable_once(thing):
+                    start = spill.tell()
+                    for item in items:
+                        content = item.svg_content().encode()
+                        spill.write(SPILLED_ITEM.pack(*_place(item), len(content)))
+                        spill.write(content)
+                    spilled[position] = (start, spill.tell())
+                else:
+                    for _ in items:
+                        pass
+        display = Displayer(quadrant)
+        svg_file = display.open_svg(filename)
+        for color, thing, spilled_range in zip(cycle(iter(Displayer.svg_colors)), things,
+                                               spilled):
+            svg_file.write('<g fill="{}" stroke="{}">\n'.format(color, color))
+            if spilled_range is None:
+                for item in _items(thing):
+                    if not (decimate and display.is_hidden(item)):
+                        svg_file.write(item.svg_content())
+            else:
+                start, end = spilled_range
+                spill.seek(start)
+                while spill.tell() < end:
+                    x, y, extent, size = SPILLED_ITEM.unpack(spill.read(SPILLED_ITEM.size))
+                    content = spill.read(size)
+                    if not (decimate and display.is_hidden_at(x, y, extent)):
+                        svg_file.write(content.decode())
+            svg_file.write('</g>\n')
+        display.close_svg(svg_file)
+
+def bounding_quadrant(things):
+    """
+    returns the bounding quadrant of all things (without building a
+    quadrant for each point or segment).
+    """
+    quadrant = Quadrant.empty_quadrant(2)
+    for _ in _bounded(_items(things), quadrant):
+        pass
+    return quadrant
+
+def _bounded(items, quadrant):
+    """
+    iterates on the items, adding them to the quadrant (updated once
+    the iteration is over).
+    """
+    (x_min, y_min), (x_max, y_max) = Quadrant.empty_quadrant(2).get_arrays()
+    try:
+        for item in items:
+            if isinstance(item, Segment):
+                points = item.endpoints
+            elif isinstance(item, Point):
+                points = (item,)
+            else:
+                quadrant.update(item.bounding_quadrant())
+                points = ()
+            for point in points:
+                x, y = point.coordinates
+                x_min, x_max = min(x_min, x), max(x_max, x)
+                y_min, y_max = min(y_min, y), max(y_max, y)
+            yield item
+    finally:
+        quadrant.update(Quadrant([x_min, y_min], [x_max, y_max]))
+
+def _place(thing):
+    """
+    returns the (x, y, extent) place of a point or a segment for the
+    decimation (other things have an infinite extent, they are never
+    hidden).
+    """
+    if isinstance(thing, Point):
+        x, y = thing.coordinates
+        return x, y, 0.0
+    if isinstance(thing, Segment):
+        (x_1, y_1), (x_2, y_2) = (p.coordinates for p in thing.endpoints)
+        return x_1, y_1, max(abs(x_2 - x_1), abs(y_2 - y_1))
+    return 0.0, 0.0, float("inf")
+
+def _items(thing):
+    """
+    iterates on the displayable objects inside thing.
+    """
+    if isinstance(thing, (Point, Segment)):
+        yield thing
+        return
+    try:
+        iterator = iter(thing)
+    except TypeError:
+        # we cannot iterate on it
+        yield thing
+        return
+    for subthing in iterator:
+        yield from _items(subthing)
+
+def _iterable_once(thing):
+    """
+    returns true if thing can only be iterated once (a generator for
+    example).
+    """
+    try:
+        return iter(thing) is thing
+    except TypeError:
+        return False
 
 def compute_displays(things):
     """
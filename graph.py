@@ -4,9 +4,9 @@ Module graph
 """
 import sys
 from time import perf_counter
-import matplotlib.pyplot as plt
 import numpy as np
-from bo import test
+from geo.bo_file import load_segments
+from bo import intersect
 
 def theo_graph(x):
     """ reference function """
@@ -15,11 +15,14 @@ def theo_graph(x):
 def draw_graph(test_file):
     """
     draw a graph based on the test for the bentley ottmann algorithm
+    (only the algorithm is timed, nothing is displayed during the tests)
     """
+    import matplotlib.pyplot as plt
     results = []
     for file in test_file:
+        _, segments = load_segments(file)
         time1 = perf_counter()
-        solution = test(file)
+        solution = intersect(segments)
         time2 = perf_counter()
         results.append((len(list(solution.segments())), time2-time1))
     results.sort()
@@ -35,4 +38,5 @@ def draw_graph(test_file):
     plt.plot(x_log, theo_graph(x_log))
     plt.show()
 
-draw_graph(sys.argv[1:])
+if __name__ == "__main__":
+    draw_graph(sys.argv[1:])
@@ -0,0 +1,110 @@
+"""
+incremental intersections.
+a solved set of segments is kept in a uniform grid (see spatial_grid) so
+that batches of segments can be inserted or removed later, only the
+segments sharing a cell with the batch being tested.
+"""
+from math import ceil, sqrt
+from geo.quadrant import Quadrant
+from geo.segment import Segment
+from solution import Solution
+from spatial_grid import Grid, bounding_box
+
+class IncrementalIntersections:
+    """
+    segments and their intersections, updated by batches.
+
+    for example:
+
+        index = IncrementalIntersections(segments)
+        index.insert(new_segments)
+        index.remove(old_segments)
+        index.solution.intersection_points()
+
+    the grid is sized on the initial segments (about one cell per segment);
+    segments outside of it go to its border cells, which stays correct but
+    slower.
+    """
+    def __init__(self, segments, solution=None, cells_per_axis=None):
+        """
+        indexes the segments. their intersections are taken from the given
+        solution if they are already solved, computed with the sweep
+        otherwise.
+        """
+        segments = list(segments)
+        if solution is None:
+            from bo import bentley_ottmann
+            solution = Solution(segments)
+            bentley_ottmann(segments, solution)
+        self.solution = solution
+        quadrant = Quadrant.empty_quadrant(2)
+        for segment in segments:
+            quadrant.update(segment.bounding_quadrant())
+        if not segments:
+            quadrant = Quadrant([0.0, 0.0], [1.0, 1.0])
+        if cells_per_axis is None:
+            cells_per_axis = max(1, ceil(sqrt(len(segments))))
+        self.grid = Grid(quadrant, cells_per_axis)
+        # segments (in a dictionary used as an ordered set) by cell and
+        # boxes by segment
+        self.cells = dict()
+        self.boxes = dict()
+        for segment in segments:
+            self._bucket(segment)
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, segment):
+        return segment in self.boxes
+
+    def _bucket(self, segment):
+        """
+        adds the segment to the cells of its box.
+        """
+        box = self.boxes[segment] = bounding_box(segment)
+        for cell in self.grid.cells(box):
+            self.cells.setdefault(cell, dict())[segment] = None
+
+    def insert(self, segments):
+        """
+        adds the segments and their intersections (with the indexed
+        segments and between themselves) to the solution.
+        returns the new intersection points.
+        """
+        new_points = dict()
+        for segment in segments:
+            self.solution.add_segment(segment)
+            box = bounding_box(segment)
+            tested = set()
+            for cell in self.grid.cells(box):
+                for other in self.cells.get(cell, ()):
+                    if other in tested:
+                        continue
+                    tested.add(other)
+                    other_box = self.boxes[other]
+                    if box[0] > other_box[2] or other_box[0] > box[2] or \
+                       box[1] > other_box[3] or other_box[1] > box[3]:
+                        continue  # disjoint boxes
+                    point = segment.intersection_with(other)
+                    if point is not None:
+                        point = Segment.adjuster.hash_point(point)
+                        if point not in self.solution.points_ids:
+                            new_points[point] = None
+                        self.solution.add(segment, point)
+                        self.solution.add(other, point)
+            self._bucket(segment)
+        return list(new_points)
+
+    def remove(self, segments):
+        """
+        removes the segments and their intersections from the solution.
+        """
+        for segment in segments:
+            box = self.boxes.pop(segment)
+            for cell in self.grid.cells(box):
+                bucket = self.cells[cell]
+                del bucket[segment]
+                if not bucket:
+                    del self.cells[cell]
+            self.solution.remove_segment(segment)
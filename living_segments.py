@@ -0,0 +1,281 @@
+"""
+LivingSegments module
+contains the structure storing the segments crossed by the sweeping line.
+"""
+from random import random
+
+#pylint: disable=R0903
+class LivingNode:
+    """
+    a node of the living segments tree.
+    each living segment keeps its node (segment.living_node) which is used
+    as a handle to find its position and its neighbours without comparing
+    segments.
+    """
+    __slots__ = ("segment", "priority", "parent", "left", "right", "size",
+                 "previous", "next")
+
+    def __init__(self, segment):
+        self.segment = segment
+        self.priority = random()
+        self.parent = None
+        self.left = None
+        self.right = None
+        self.size = 1
+        # threaded links to the in-order neighbours
+        self.previous = None
+        self.next = None
+
+def _size(node):
+    """
+    returns the number of nodes in the subtree rooted on node.
+    """
+    if node is None:
+        return 0
+    return node.size
+
+class LivingSegments:
+    """
+    ordered container of the living segments (a treap).
+
+    segments are ordered with their comparison operator when inserted.
+    once inserted a segment is only reached through its handle so finding
+    its index, its neighbours or removing it is done in O(log n) without
+    recomputing any key.
+    """
+
+    def __init__(self, segments=None):
+        """
+        creates an empty structure (and adds the given segments)
+        """
+        self.root = None
+        if segments is not None:
+            for segment in segments:
+                self.add(segment)
+
+    def __len__(self):
+        return _size(self.root)
+
+    def __iter__(self):
+        node = self.first()
+        while node is not None:
+            yield node.segment
+            node = node.next
+
+    def __contains__(self, segment):
+        return segment.living_node is not None
+
+    def __getitem__(self, index):
+        """
+        returns the segment at the given position.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("living segments index out of range")
+        node = self.root
+        while True:
+            left_size = _size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.segment
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def add(self, segment):
+        """
+        inserts the segment at its place (after the equal ones) and stores
+        its handle in the segment.
+        an already living segment is moved to its new place.
+        """
+        if segment.living_node is not None:
+            self.remove(segment)
+        # Descending in the tree, keeping track of the future neighbours
+        current = self.root
+        previous, following = None, None
+        while current is not None:
+            if segment < current.segment:
+                following = current
+                current = current.left
+            else:
+                previous = current
+                current = current.right
+        return self._attach(segment, previous, following)
+
+    def insert(self, segment, following=None):
+        """
+        inserts the segment just before the node following (at the end if
+        following is None) without comparing any segment.
+        an already living segment is moved to its new place.
+        """
+        if segment.living_node is not None:
+            self.remove(segment)
+        if following is None:
+            previous = self.last()
+        else:
+            previous = following.previous
+        return self._attach(segment, previous, following)
+
+    def first(self):
+        """
+        returns the node of the leftmost segment (None if empty).
+        """
+        node = self.root
+        if node is None:
+            return None
+        while node.left is not None:
+            node = node.left
+        return node
+
+    def last(self):
+        """
+        returns the node of the rightmost segment (None if empty).
+        """
+        node = self.root
+        if node is None:
+            return None
+        while node.right is not None:
+            node = node.right
+        return node
+
+    def locate(self, side):
+        """
+        returns the node of the leftmost segment for which side(segment)
+        is not negative (None if there is none).
+        side must be non decreasing along the living segments.
+        """
+        node, found = self.root, None
+        while node is not None:
+            if side(node.segment) < 0:
+                node = node.right
+            else:
+                found = node
+                node = node.left
+        return found
+
+    def remove(self, segment):
+        """
+        removes the segment from the structure.
+        does nothing if the segment is not living.
+        """
+        node = segment.living_node
+        if node is None:
+            return
+        segment.living_node = None
+
+        # Moving the node down until it is a leaf
+        while node.left is not None or node.right is not None:
+            if node.right is None or \
+               (node.left is not None and node.left.priority > node.right.priority):
+                self._rotate_up(node.left)
+            else:
+                self._rotate_up(node.right)
+
+        # Detaching the leaf
+        parent = node.parent
+        if parent is None:
+            self.root = None
+        elif parent.left is node:
+            parent.left = None
+        else:
+            parent.right = None
+        while parent is not None:
+            parent.size -= 1
+            parent = parent.parent
+
+        # Unthreading it
+        if node.previous is not None:
+            node.previous.next = node.next
+        if node.next is not None:
+            node.next.previous = node.previous
+
+    def index(self, segment):
+        """
+        returns the position of the segment in the structure
+        (None if not living).
+        """
+        node = segment.living_node
+        if node is None:
+            return None
+        position = _size(node.left)
+        while node.parent is not None:
+            if node.parent.right is node:
+                position += _size(node.parent.left) + 1
+            node = node.parent
+        return position
+
+    def neighbours(self, segment):
+        """
+        returns the left and right neighbours of the segment
+        (None if there is no neighbour or if the segment is not living).
+        """
+        node = segment.living_node
+        if node is None:
+            return [None, None]
+        left = node.previous.segment if node.previous is not None else None
+        right = node.next.segment if node.next is not None else None
+        return [left, right]
+
+    def _attach(self, segment, previous, following):
+        """
+        creates the node of the segment between the two given consecutive
+        nodes (one of them is always free on the needed side).
+        """
+        node = LivingNode(segment)
+        segment.living_node = node
+
+        # Hanging the node as a leaf
+        if self.root is None:
+            self.root = node
+        elif previous is not None and previous.right is None:
+            previous.right = node
+            node.parent = previous
+        else:
+            following.left = node
+            node.parent = following
+        parent = node.parent
+        while parent is not None:
+            parent.size += 1
+            parent = parent.parent
+
+        # Threading the node between its neighbours
+        node.previous, node.next = previous, following
+        if previous is not None:
+            previous.next = node
+        if following is not None:
+            following.previous = node
+
+        # Restoring the heap property on priorities
+        while node.parent is not None and node.priority > node.parent.priority:
+            self._rotate_up(node)
+        return node
+
+    def _rotate_up(self, node):
+        """
+        rotates the node above its parent, keeping the in-order sequence.
+        """
+        parent = node.parent
+        grand_parent = parent.parent
+        if parent.left is node:
+            parent.left = node.right
+            if node.right is not None:
+                node.right.parent = parent
+            node.right = parent
+        else:
+            parent.right = node.left
+            if node.left is not None:
+                node.left.parent = parent
+            node.left = parent
+        parent.parent = node
+        node.parent = grand_parent
+        if grand_parent is None:
+            self.root = node
+        elif grand_parent.left is parent:
+            grand_parent.left = node
+        else:
+            grand_parent.right = node
+
+        parent.size = _size(parent.left) + _size(parent.right) + 1
+        node.size = _size(node.left) + _size(node.right) + 1
@@ -0,0 +1,181 @@
+"""
+metrics of a run.
+counters and timers are only installed (by wrapping the methods of the
+hot path) while recording, so an unrecorded run pays nothing.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+import events as events_module
+from events import Events, CREATION, DESTRUCTION, INTERSECTION
+from geo.segment import Segment
+from patches import patched
+
+EVENT_NAMES = {CREATION: "creation", DESTRUCTION: "destruction", INTERSECTION: "intersection"}
+
+class Metrics:
+    """
+    counters and phases times of a run.
+
+    for example:
+
+        metrics = Metrics()
+        bentley_ottmann(segments, solution, metrics)
+        metrics.summary()
+    """
+    def __init__(self):
+        self.counters = Counter()
+        # cumulated time by phase
+        self.times = Counter()
+        self.max_living = 0
+
+    @contextmanager
+    def phase(self, name):
+        """
+        adds the time spent in the block to the phase.
+        """
+        start = perf_counter()
+        try:
+            yield self
+        finally:
+            self.times[name] += perf_counter() - start
+
+    @contextmanager
+    def recording(self):
+        """
+        counts the operations done in the block.
+        """
+        patches = [
+            (Segment, "__lt__", self._counted(Segment.__lt__, "comparisons")),
+            (Segment, "compute_key", self._counted(Segment.compute_key, "compute_key")),
+            (Segment, "intersection_with", self._intersection_with(Segment.intersection_with)),
+            (events_module, "compare_slopes",
+             self._counted(events_module.compare_slopes, "slope comparisons")),
+            (Events, "add_event", self._add_event(Events.add_event)),
+            (Events, "pop", self._pop(Events.pop)),
+            (Events, "handle_event", self._handle_event(Events.handle_event)),
+            (Events, "remove_passing_segments",
+             self._timed(Events.remove_passing_segments, "locate")),
+            (Events, "find_new_event", self._timed(Events.find_new_event, "neighbours tests")),
+            (Segment.adjuster, "hash_point", self._hash_point(Segment.adjuster)),
+        ]
+        with patched(patches):
+            yield self
+
+    def _counted(self, function, counter):
+        """
+        wraps the function, counting its calls.
+        """
+        counters = self.counters
+        def counted(*arguments):
+            counters[counter] += 1
+            return function(*arguments)
+        return counted
+
+    def _timed(self, function, phase):
+        """
+        wraps the function, adding its time to the phase.
+        """
+        times = self.times
+        def timed(*arguments):
+            start = perf_counter()
+            result = function(*arguments)
+            times[phase] += perf_counter() - start
+            return result
+        return timed
+
+    def _intersection_with(self, intersection_with):
+        """
+        counts the intersection tests and the intersections found.
+        """
+        counters = self.counters
+        def counted(segment, other):
+            counters["intersection tests"] += 1
+            point = intersection_with(segment, other)
+            if point is not None:
+                counters["intersections found"] += 1
+            return point
+        return counted
+
+    def _add_event(self, add_event):
+        """
+        counts the events pushed in the queue.
+        """
+        counters, times = self.counters, self.times
+        def counted(events, event_type, point):
+            start = perf_counter()
+            size = len(events.event_list)
+            event = add_event(events, event_type, point)
+            if len(events.event_list) > size:
+                counters["queue pushes"] += 1
+            times["queue"] += perf_counter() - start
+            return event
+        return counted
+
+    def _pop(self, pop):
+        """
+        counts the events points and, by type, the events on them (a point
+        can be the creation, destruction and intersection point of several
+        segments at once).
+        """
+        counters, times = self.counters, self.times
+        def counted(events):
+            start = perf_counter()
+            event = pop(events)
+            times["queue"] += perf_counter() - start
+            point = event.key
+            counters["event points"] += 1
+            for event_type, points in ((CREATION, events.begin_points),
+                                       (DESTRUCTION, events.end_points),
+                                       (INTERSECTION, events.inter_points)):
+                if points.get(point):
+                    counters["{} events".format(EVENT_NAMES[event_type])] += 1
+            return event
+        return counted
+
+    def _handle_event(self, handle_event):
+        """
+        times the events processing and follows the living segments size.
+        """
+        times = self.times
+        def timed(events, event, living_segments, solution):
+            start = perf_counter()
+            handle_event(events, event, living_segments, solution)
+            times["events processing"] += perf_counter() - start
+            self.max_living = max(self.max_living, len(living_segments))
+        return timed
+
+    def _hash_point(self, adjuster):
+        """
+        counts the adjusted points already known (hits) or new (misses).
+        """
+        counters, hash_point = self.counters, adjuster.hash_point
+        def counted(point):
+            known = point in adjuster.fast_hash
+            adjusted = hash_point(point)
+            if known or adjusted != point:
+                counters["hash hits"] += 1
+            else:
+                counters["hash misses"] += 1
+            return adjusted
+        return counted
+
+    def as_dict(self):
+        """
+        returns the counters, the maximum number of living segments and
+        the phases times.
+        """
+        return {"counters": dict(self.counters), "max living segments": self.max_living,
+                "times": dict(self.times)}
+
+    def summary(self):
+        """
+        prints the metrics.
+        """
+        print("\n========== metrics ==========")
+        for name, value in sorted(self.counters.items()):
+            print("{:>24}: {}".format(name, value))
+        print("{:>24}: {}".format("max living segments", self.max_living))
+        for name, value in sorted(self.times.items()):
+            print("{:>24}: {:.6f}s".format(name + " time", value))
+        print("=============================\n")
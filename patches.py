@@ -0,0 +1,24 @@
+"""
+temporary replacement of attributes (methods of classes, functions of
+modules), used by the opt-in instrumentations (metrics, sweep_trace).
+"""
+from contextlib import contextmanager
+
+@contextmanager
+def patched(patches):
+    """
+    replaces the attributes given as (owner, name, value) triplets in the
+    block and restores them afterwards (inherited attributes are deleted
+    from the owner again).
+    """
+    originals = [(owner, name, owner.__dict__.get(name)) for owner, name, _ in patches]
+    for owner, name, value in patches:
+        setattr(owner, name, value)
+    try:
+        yield
+    finally:
+        for owner, name, original in originals:
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
@@ -0,0 +1,188 @@
+"""
+static spatial index of segments (requires numpy).
+a packed r-tree is bulk loaded once (sort tile recursive) over the
+bounding quadrants of the segments and stored in flat arrays: the leaves
+are the boxes of the segments in the tree order, each upper level groups
+CAPACITY consecutive boxes of the level below. queries go down the levels
+keeping the boxes intersecting the query only.
+
+the index can be saved to and loaded from a .npz file.
+"""
+from math import ceil, sqrt
+import numpy as np
+from geo.quadrant import Quadrant
+from geo.bo_file import LazySegments
+from geo.segment import contains_margin
+
+# number of children of each node
+CAPACITY = 16
+
+class SegmentIndex:
+    """
+    r-tree of segments answering window and probe segment queries.
+    segments are identified by their position in the indexed sequence.
+
+    for example:
+
+        index = SegmentIndex(segments)
+        index.window(Quadrant([0.0, 0.0], [1.0, 1.0]))
+        index.probe(segment)
+        index.save("segments.npz")
+        index = SegmentIndex.load("segments.npz")
+    """
+    def __init__(self, segments, capacity=CAPACITY):
+        """
+        bulk loads the index over the segments (a sequence of segments).
+        """
+        coordinates = []
+        for segment in segments:
+            coordinates.extend(segment.endpoints[0].coordinates)
+            coordinates.extend(segment.endpoints[1].coordinates)
+        self._build(np.array(coordinates, dtype=np.float64).reshape(-1, 4), capacity)
+        self.segments = segments
+
+    @classmethod
+    def from_coordinates(cls, coordinates, capacity=CAPACITY):
+        """
+        bulk loads the index over a (n, 4) array of segments coordinates
+        (x1, y1, x2, y2), for example an adjusted .bo file (see
+        geo.bo_file).
+        """
+        index = cls.__new__(cls)
+        index._build(np.asarray(coordinates, dtype=np.float64).reshape(-1, 4), capacity)
+        index.segments = LazySegments(index.coordinates)
+        return index
+
+    def _build(self, coordinates, capacity):
+        """
+        packs the tree over the coordinates.
+        """
+        self.coordinates = coordinates
+        self.capacity = capacity
+        boxes = np.column_stack((np.minimum(coordinates[:, 0], coordinates[:, 2]),
+                                 np.minimum(coordinates[:, 1], coordinates[:, 3]),
+                                 np.maximum(coordinates[:, 0], coordinates[:, 2]),
+                                 np.maximum(coordinates[:, 1], coordinates[:, 3])))
+        # largest tolerance margin of Segment.contains
+        lengths = np.hypot(coordinates[:, 2] - coordinates[:, 0],
+                           coordinates[:, 3] - coordinates[:, 1])
+        self.margin = contains_margin(float(lengths.max(initial=0.0)))
+
+        # Sorting the leaves in vertical slices of boxes sorted by height
+        count = len(boxes)
+        centers = 0.5 * (boxes[:, :2] + boxes[:, 2:])
+        slice_size = capacity * ceil(sqrt(ceil(count / capacity))) or 1
+        by_x = np.argsort(centers[:, 0], kind="stable")
+        slices = np.empty(count, dtype=np.int64)
+        slices[by_x] = np.arange(count) // slice_size
+        self.order = np.lexsort((centers[:, 1], slices))
+
+        # Levels, from the leaves to the root
+        levels = [boxes[self.order]]
+        while len(levels[-1]) > 1:
+            below = levels[-1]
+            padding = -len(below) % capacity
+            padded = np.concatenate((below, np.tile([np.inf, np.inf, -np.inf, -np.inf],
+                                                    (padding, 1))))
+            groups = padded.reshape(-1, capacity, 4)
+            levels.append(np.column_stack((groups[:, :, 0].min(axis=1),
+                                           groups[:, :, 1].min(axis=1),
+                                           groups[:, :, 2].max(axis=1),
+                                           groups[:, :, 3].max(axis=1))))
+        self.levels = levels
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    def bounding_quadrant(self):
+        """
+        returns the quadrant of all the indexed segments.
+        """
+        if not len(self):
+            return Quadrant.empty_quadrant(2)
+        x_min, y_min, x_max, y_max = self.levels[-1][0].tolist()
+        return Quadrant([x_min, y_min], [x_max, y_max])
+
+    def candidates(self, box):
+        """
+        returns the positions of the segments whose boxes intersect the box
+        (xmin, ymin, xmax, ymax), in the tree order.
+        """
+        x_min, y_min, x_max, y_max = box
+        nodes = np.arange(len(self.levels[-1]))
+        for level in reversed(range(len(self.levels))):
+            boxes = self.levels[level][nodes]
+            nodes = nodes[(boxes[:, 0] <= x_max) & (boxes[:, 2] >= x_min) &
+                          (boxes[:, 1] <= y_max) & (boxes[:, 3] >= y_min)]
+            if level:
+                nodes = (nodes[:, None] * self.capacity + np.arange(self.capacity)).ravel()
+                nodes = nodes[nodes < len(self.levels[level - 1])]
+        return self.order[nodes]
+
+    def window(self, quadrant):
+        """
+        returns the sorted positions of the segments crossing the
+        rectangular window (a Quadrant).
+        """
+        x_min, y_min = quadrant.min_coordinates
+        x_max, y_max = quadrant.max_coordinates
+        positions = self.candidates((x_min, y_min, x_max, y_max))
+        x_1, y_1, x_2, y_2 = self.coordinates[positions].T
+        # Clipping the segments by the window (liang barsky)
+        start, end = np.zeros(len(positions)), np.ones(len(positions))
+        inside = np.ones(len(positions), dtype=bool)
+        width, height = x_2 - x_1, y_2 - y_1
+        for direction, distance in ((-width, x_1 - x_min), (width, x_max - x_1),
+                                    (-height, y_1 - y_min), (height, y_max - y_1)):
+            parallel = direction == 0
+            inside &= ~parallel | (distance >= 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = distance / direction
+            entering, leaving = ~parallel & (direction < 0), ~parallel & (direction > 0)
+            start = np.where(entering, np.maximum(start, ratio), start)
+            end = np.where(leaving, np.minimum(end, ratio), end)
+        return np.sort(positions[inside & (start <= end)]).tolist()
+
+    def probe(self, segment):
+        """
+        returns the sorted (position, intersection point) pairs of the
+        segments intersecting the given segment (see
+        Segment.intersection_with; points are not adjusted).
+        """
+        quadrant = segment.bounding_quadrant()
+        margin = contains_margin(segment.length()) + self.margin
+        positions = self.candidates((quadrant.min_coordinates[0] - margin,
+                                     quadrant.min_coordinates[1] - margin,
+                                     quadrant.max_coordinates[0] + margin,
+                                     quadrant.max_coordinates[1] + margin))
+        found = []
+        for position in np.sort(positions).tolist():
+            point = segment.intersection_with(self.segments[position])
+            if point is not None:
+                found.append((position, point))
+        return found
+
+    def save(self, filename):
+        """
+        saves the index in a .npz file.
+        """
+        np.savez(filename, coordinates=self.coordinates, order=self.order,
+                 sizes=np.array([len(level) for level in self.levels], dtype=np.int64),
+                 boxes=np.concatenate(self.levels),
+                 parameters=np.array([self.capacity, self.margin]))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        loads an index saved in a .npz file (its segments are built from
+        the saved coordinates).
+        """
+        with np.load(filename) as data:
+            index = cls.__new__(cls)
+            index.coordinates, index.order = data["coordinates"], data["order"]
+            capacity, index.margin = data["parameters"].tolist()
+            index.capacity = int(capacity)
+            bounds = np.cumsum(data["sizes"])[:-1]
+            index.levels = np.split(data["boxes"], bounds)
+        index.segments = LazySegments(index.coordinates)
+        return index
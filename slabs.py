@@ -0,0 +1,173 @@
+"""
+parallel sweep.
+the plane is cut in horizontal slabs with about the same number of
+endpoints and each slab is swept in its own process, segments being
+clipped to the slab. an intersection belongs to the slab containing it
+(the upper one for points on a boundary) so merging the solutions
+keeps each point once.
+"""
+import os
+from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor
+from geo.point import Point
+from geo.segment import Segment
+from events import Event, Events, CREATION, DESTRUCTION
+from living_segments import LivingSegments
+from solution import Solution
+
+def slab_boundaries(segments, slabs):
+    """
+    returns the ordinates cutting the segments in the given number of
+    slabs (at most), from top to bottom, each slab getting about the same
+    number of endpoints.
+    """
+    ordinates = sorted(point.coordinates[1] for segment in segments
+                       for point in segment.endpoints)
+    if not ordinates:
+        return []
+    boundaries = set(ordinates[len(ordinates) * slab // slabs] for slab in range(1, slabs))
+    # the bottom of the lowest slab is not a boundary
+    boundaries.discard(ordinates[0])
+    return sorted(boundaries, reverse=True)
+
+def parallel_bentley_ottmann(segments, solution, workers=None, slabs=None):
+    """
+    computes the intersections of the segments by sweeping slabs in
+    parallel and adds them to the solution.
+    there are as many slabs as workers by default.
+    """
+    segments = list(segments)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if slabs is None:
+        slabs = workers
+    boundaries = slab_boundaries(segments, slabs)
+    limits = list(zip([None] + boundaries, boundaries + [None]))
+
+    # Slab tasks: the segments (with their position) touching the slab
+    tasks = []
+    for top, bottom in limits:
+        slab_segments = []
+        for position, segment in enumerate(segments):
+            lowest, highest = sorted(p.coordinates[1] for p in segment.endpoints)
+            if (top is None or lowest < top) and (bottom is None or highest >= bottom):
+                slab_segments.append((position, segment.endpoints[0].coordinates,
+                                      segment.endpoints[1].coordinates))
+        tasks.append((slab_segments, top, bottom, Segment.adjuster, Segment.exact))
+
+    if len(tasks) == 1 or workers == 1:
+        # each slab gets its own adjuster, as in a worker
+        results = [sweep_slab(deepcopy(task)) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(sweep_slab, tasks))
+
+    # Merging the slabs. Each slab adjusted its points without knowing the
+    # ones of the slabs above : the original points are adjusted again,
+    # from top to bottom and in the order of each slab.
+    for intersections, hashed in results:
+        adjusted = {point: Segment.adjuster.hash_point(Point(original))
+                    for point, original in hashed}
+        for position, points in intersections:
+            for point in points:
+                # points not adjusted in the slab are endpoints
+                point = adjusted[point] if point in adjusted else Point(point)
+                solution.add(segments[position], point)
+    return solution
+
+def sweep_slab(task):
+    """
+    sweeps the segments of a slab (worker side).
+    returns for each segment its position and the coordinates of the
+    intersections in the slab, with the adjusted points (and the points
+    they were adjusted from) in the order they were first met.
+    """
+    slab_segments, top, bottom, adjuster, exact = task
+    previous_adjuster, previous_exact = Segment.adjuster, Segment.exact
+    Segment.adjuster, Segment.exact = RecordingAdjuster(adjuster), exact
+    try:
+        intersections = _sweep_slab(slab_segments, top, bottom)
+    finally:
+        hashed = [(point.coordinates, original.coordinates)
+                  for point, original in Segment.adjuster.originals.items()]
+        Segment.adjuster, Segment.exact = previous_adjuster, previous_exact
+    return intersections, hashed
+
+def _sweep_slab(slab_segments, top, bottom):
+    """
+    sweeps the segments clipped between top and bottom.
+    """
+    segments = [Segment([Point(start), Point(end)], position)
+                for position, start, end in slab_segments]
+    solution = Solution(segments)
+
+    events = ClippedEvents(segments, top)
+    living_segments = LivingSegments()
+    Segment.current_point = None
+    while not events.isempty():
+        if bottom is not None and events.event_list[0].key.coordinates[1] < bottom:
+            break
+        current_event = events.pop()
+        Segment.current_point = current_event.key
+        events.handle_event(current_event, living_segments, solution)
+
+    # keeping the points of the slab (the top boundary belongs to the
+    # slab above)
+    intersections = []
+    for segment in segments:
+        points = [point.coordinates for point in solution.points(segment)
+                  if (top is None or point.coordinates[1] < top) and
+                  (bottom is None or point.coordinates[1] >= bottom)]
+        if points:
+            intersections.append((segment.index, points))
+    return intersections
+
+class RecordingAdjuster:
+    """
+    adjuster remembering, for each adjusted point, the first point it
+    was adjusted from.
+    """
+    def __init__(self, adjuster):
+        self.adjuster = adjuster
+        self.precision = adjuster.precision
+        self.originals = dict()
+
+    def hash_point(self, point):
+        """
+        adjusts the point with the adjuster.
+        """
+        adjusted = self.adjuster.hash_point(point)
+        self.originals.setdefault(adjusted, point)
+        return adjusted
+
+    def hash_coordinate(self, coordinate, index=0):
+        """
+        adjusts the coordinate with the adjuster.
+        """
+        return self.adjuster.hash_coordinate(coordinate, index)
+
+class ClippedEvents(Events):
+    """
+    events of segments clipped under a top ordinate : segments coming from
+    above are created on their point of the top line.
+    """
+
+    def __init__(self, segments, top=None):
+        self.top = top
+        super().__init__(segments)
+
+    def init_segment_events(self, segment):
+        """
+        creates two event for the segment (clipping its upper endpoint)
+        """
+        upper, lower = max(segment.endpoints), min(segment.endpoints)
+        if self.top is not None and upper.coordinates[1] > self.top:
+            (x_1, y_1), (x_2, y_2) = upper.coordinates, lower.coordinates
+            upper = Point([x_1 + (self.top - y_1) * (x_2 - x_1) / (y_2 - y_1), self.top])
+        if upper not in self.event_points:
+            self.event_points[upper] = Event(CREATION, upper)
+        if lower not in self.event_points:
+            self.event_points[lower] = Event(DESTRUCTION, lower)
+
+        self.begin_points.setdefault(upper, []).append(segment)
+        self.end_points.setdefault(lower, []).append(segment)
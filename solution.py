@@ -1,30 +1,78 @@
 """
 Solution module for the Bentley Ottmann algorithm
 """
-from itertools import combinations
-from geo.tycat import tycat
+
+from array import array
 
 class Solution:
     """
     solution: associates to all the segment their intersection
+    intersection points are stored once, in a table giving them integer
+    ids, and each segment keeps the ids of its points, so that no query
+    has to rebuild anything.
     """
     def __init__(self, segments):
         """
         initializes a hastable that associates to all the segments an empty
-        set of intersection point
+        array of intersection points ids.
         """
         self.hashtable = dict()
+        # intersection points by id (None once removed), ids by point and
+        # segments (in a dictionary used as an ordered set) by id
+        self.points_table = []
+        self.points_ids = dict()
+        self.points_segments = []
+        # metrics of the run computing the solution (see metrics)
+        self.metrics = None
         for segment in segments:
-            self.hashtable[segment] = set()
+            self.add_segment(segment)
+
+    def add_segment(self, segment):
+        """
+        adds a segment (without intersections) to the solution
+        """
+        self.hashtable[segment] = array("q")
 
     def add(self, segment, point):
         """
         adds the intersection point to a segment in the solution
-        """
-        if segment not in self.hashtable:
-            print("Segment not in the solution")
+        (raises KeyError if the segment is not in the solution)
+        """
+        ids = self.hashtable[segment]
+        point_id = self.points_ids.get(point)
+        if point_id is None:
+            point_id = len(self.points_table)
+            self.points_ids[point] = point_id
+            self.points_table.append(point)
+            self.points_segments.append({segment: None})
+        elif segment in self.points_segments[point_id]:
+            return
         else:
-            self.hashtable[segment].add(point)
+            self.points_segments[point_id][segment] = None
+        ids.append(point_id)
+
+    def remove_segment(self, segment):
+        """
+        removes a segment and its intersections from the solution.
+        its points are also removed from the other segments when they do
+        not cross any remaining segment on them. removed points ids are not
+        reused.
+        """
+        for point_id in self.hashtable.pop(segment):
+            segments = self.points_segments[point_id]
+            del segments[segment]
+            # segments only touching parallel segments are not intersecting
+            others = list(segments)
+            for other in others:
+                if segment.line_intersection_with(other) is None:
+                    continue
+                if not any(other.line_intersection_with(third) is not None
+                           for third in others if third is not other):
+                    del segments[other]
+                    self.hashtable[other].remove(point_id)
+            if not segments:
+                del self.points_ids[self.points_table[point_id]]
+                self.points_table[point_id] = None
 
     def segments(self):
         """
@@ -38,22 +86,37 @@ class Solution:
         iterates on all the intersection points in the solution for the given
         segment
         """
-        for point in self.hashtable[segment]:
-            yield point
+        points_table = self.points_table
+        for point_id in self.hashtable[segment]:
+            yield points_table[point_id]
+
+    def points_count(self, segment):
+        """
+        returns the number of intersection points of the given segment
+        """
+        return len(self.hashtable[segment])
 
     def intersection_points(self):
         """
         iterates on all the intersections point once
         """
-        # Final set with all the points
-        points = set()
-        # fills the set with all the intersection points
-        for segment in self.hashtable:
-            for point in self.hashtable[segment]:
-                points.add(point)
-        for inter_point in points:
-            # iterates on the intersection points
-            yield inter_point
+        yield from self.points_ids
+
+    def intersections_count(self):
+        """
+        returns the number of intersection points
+        """
+        return len(self.points_ids)
+
+    def segments_through(self, point):
+        """
+        iterates on the segments having the given intersection point
+        (none if it is not an intersection point)
+        """
+        point_id = self.points_ids.get(point)
+        if point_id is None:
+            return
+        yield from self.points_segments[point_id]
 
     def summary(self):
         """
@@ -62,29 +125,110 @@ class Solution:
         """
         print("\n========== Nombre d'intersections pour chaque segment ==========\n")
         for segment in self.segments():
-            print("{} intersections pour le segment: {}".format(len(list(self.points(segment))),
+            print("{} intersections pour le segment: {}".format(self.points_count(segment),
                                                                 segment))
         print("\n=================================================================\n")
-        print("\n Le nombre d'intersection est :", len(list(self.intersection_points())))
+        print("\n Le nombre d'intersection est :", self.intersections_count())
 
 
     def draw(self):
         """
         draws the segment and the intersection points
         """
+        from geo.tycat import tycat
         tycat(self.segments(), self.intersection_points())
 
     def draw_step(self, living, current):
         """
         draw the living segments and the current_point on top of the normal draw
         """
+        from geo.tycat import tycat
         tycat(self.segments(), self.intersection_points(), living, current)
 
     def simple_algorithm(self):
         """
-        computes the number of interections with the naive algorithm in O(n^2)
+        computes the intersections with the brute force algorithm in O(n^2)
+        (see brute_force), draws them and returns their number.
+        """
+        from brute_force import brute_force
+        from geo.tycat import tycat
+        reference = Solution(self.segments())
+        brute_force(self.segments(), reference)
+        tycat(reference.segments(), reference.intersection_points())
+        return reference.intersections_count()
+
+class CountingSolution(Solution):
+    """
+    solution only counting the intersections (no point is stored).
+    the points of a segment must be added once and the segments of a point
+    consecutively, as the sweep does.
+    """
+    def __init__(self, segments):
+        self.count = 0
+        self.last_point = None
+        super().__init__(segments)
+
+    def add_segment(self, segment):
+        """
+        adds a segment (without intersections) to the solution
+        """
+        self.hashtable[segment] = 0
+
+    def add(self, segment, point):
+        """
+        counts the intersection point on a segment
+        """
+        self.hashtable[segment] += 1
+        if point is not self.last_point:
+            self.last_point = point
+            self.count += 1
+
+    def points(self, segment):
+        """
+        not available: points are not stored
+        """
+        raise ValueError("points are not stored when counting")
+
+    def intersection_points(self):
+        """
+        not available: points are not stored
+        """
+        raise ValueError("points are not stored when counting")
+
+    def segments_through(self, point):
+        """
+        not available: points are not stored
+        """
+        raise ValueError("points are not stored when counting")
+
+    def points_count(self, segment):
+        """
+        returns the number of intersection points of the given segment
+        """
+        return self.hashtable[segment]
+
+    def intersections_count(self):
+        """
+        returns the number of intersection points
+        """
+        return self.count
+
+class IntersectionFound(Exception):
+    """
+    raised by a FirstIntersection solution on its first intersection.
+    """
+    def __init__(self, segment, point):
+        super().__init__(point)
+        self.segment = segment
+        self.point = point
+
+class FirstIntersection(Solution):
+    """
+    solution stopping the algorithm filling it (by raising
+    IntersectionFound) as soon as an intersection is added.
+    """
+    def add(self, segment, point):
+        """
+        stops on the intersection point
         """
-        intersections = [filter(None, (c[0].intersection_with(c[1]) \
-                               for c in combinations(self.segments(), r=2)))]
-        tycat(self.segments(), intersections)
-        return len(intersections)
+        raise IntersectionFound(segment, point)
@@ -0,0 +1,99 @@
+"""
+uniform grid engine.
+segments are bucketed in the cells of a grid covering the input and only
+the segments sharing a cell are tested. fast when most segments are short
+compared to the whole input.
+"""
+from itertools import combinations
+from math import ceil, sqrt
+from geo.quadrant import Quadrant
+from geo.segment import Segment, contains_margin
+
+def grid_intersections(segments, solution, cells_per_axis=None):
+    """
+    computes all the intersections between the given segments and adds them
+    to the solution.
+    the grid has cells_per_axis * cells_per_axis cells (about one cell per
+    segment by default).
+    """
+    segments = list(segments)
+    if not segments:
+        return solution
+    boxes = [bounding_box(segment) for segment in segments]
+    quadrant = Quadrant.empty_quadrant(2)
+    for box in boxes:
+        quadrant.update(Quadrant(box[:2], box[2:]))
+    if cells_per_axis is None:
+        cells_per_axis = ceil(sqrt(len(segments)))
+    grid = Grid(quadrant, cells_per_axis)
+
+    # Bucketing the segments (in their order) in the cells of their boxes
+    cells = dict()
+    for index, box in enumerate(boxes):
+        for cell in grid.cells(box):
+            cells.setdefault(cell, []).append(index)
+
+    # Testing the pairs of each cell. A pair is tested in the cell
+    # containing the lower left corner of the intersection of the two
+    # boxes (reference point) so it is only tested once.
+    for cell, indices in cells.items():
+        for index1, index2 in combinations(indices, 2):
+            box1, box2 = boxes[index1], boxes[index2]
+            reference = (max(box1[0], box2[0]), max(box1[1], box2[1]))
+            if reference[0] > min(box1[2], box2[2]) or reference[1] > min(box1[3], box2[3]):
+                continue  # disjoint boxes
+            if grid.cell(reference) != cell:
+                continue
+            point = segments[index1].intersection_with(segments[index2])
+            if point is not None:
+                point = Segment.adjuster.hash_point(point)
+                solution.add(segments[index1], point)
+                solution.add(segments[index2], point)
+    return solution
+
+def bounding_box(segment):
+    """
+    returns the (xmin, ymin, xmax, ymax) box of the segment, enlarged to
+    contain all the points accepted by Segment.contains.
+    """
+    (x_1, y_1), (x_2, y_2) = segment.endpoints[0].coordinates, segment.endpoints[1].coordinates
+    margin = 0.0
+    if not Segment.exact:
+        margin = contains_margin(segment.length())
+    return (min(x_1, x_2) - margin, min(y_1, y_2) - margin,
+            max(x_1, x_2) + margin, max(y_1, y_2) + margin)
+
+class Grid:
+    """
+    uniform grid of cells_per_axis * cells_per_axis cells on a quadrant.
+    """
+    #pylint: disable=too-few-public-methods
+    def __init__(self, quadrant, cells_per_axis):
+        self.min_coordinates = quadrant.min_coordinates
+        self.cells_per_axis = cells_per_axis
+        self.cell_sizes = [(maximum - minimum) / cells_per_axis or 1.0
+                           for minimum, maximum in zip(*quadrant.get_arrays())]
+
+    def _cell_index(self, coordinate, index):
+        """
+        returns the index of the cell containing the coordinate on the
+        given axis.
+        """
+        cell = int((coordinate - self.min_coordinates[index]) / self.cell_sizes[index])
+        return min(max(cell, 0), self.cells_per_axis - 1)
+
+    def cell(self, point):
+        """
+        returns the cell (column, row) containing the point (coordinates).
+        """
+        return (self._cell_index(point[0], 0), self._cell_index(point[1], 1))
+
+    def cells(self, box):
+        """
+        iterates on the cells intersecting the box (xmin, ymin, xmax, ymax).
+        """
+        min_column, min_row = self.cell(box[:2])
+        max_column, max_row = self.cell(box[2:])
+        for column in range(min_column, max_column + 1):
+            for row in range(min_row, max_row + 1):
+                yield (column, row)
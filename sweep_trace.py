@@ -0,0 +1,235 @@
+"""
+binary traces of the sweep.
+while recording, each processed event is appended to a log file: its
+type and point, the operations done on the living segments, the
+neighbours tests and the segments crossing on the point. an index file
+gives the position of each event in the log, and the living segments are
+saved every SNAPSHOT_STEP events, so the living segments at any event
+can be rebuilt by replaying a few events.
+
+segments are identified by their index, which must be distinct among the
+segments of a sweep (as given by load_segments or bo.adjusted_segments).
+
+for example:
+
+    recorder = TraceRecorder("sweep.trace")
+    with recorder.recording():
+        bentley_ottmann(segments, solution)
+
+    reader = TraceReader("sweep.trace")
+    print(reader.event(12), reader.living(12))
+"""
+import struct
+from array import array
+from contextlib import contextmanager
+import events as events_module
+from events import Events, INTERSECTION
+from living_segments import LivingSegments
+from patches import patched
+
+# living segments are saved before every SNAPSHOT_STEP-th event
+SNAPSHOT_STEP = 1024
+
+# event header: type, point, sizes of the snapshot, operations, tests and
+# crossing segments
+HEADER = struct.Struct("<BddIIII")
+# operation on the living segments: type, segment, following segment
+OPERATION = struct.Struct("<bqq")
+REMOVE, INSERT = 0, 1
+# neighbours test: left and right segments, result
+TEST = struct.Struct("<qqb")
+# test results: no new intersection, intersection rounded on the current
+# point or in the past (neighbours swapped on the point), new intersection
+# below the current point
+NOTHING, ON_POINT, BELOW = 0, 1, 2
+
+class TraceRecorder:
+    """
+    writes the trace of the sweeps done while recording.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.index_filename = filename + ".index"
+        # current event record (None between events)
+        self.record = None
+        self.registered = False
+        # living segments of the current sweep and indices of its segments
+        self.living_segments = None
+        self.indices = set()
+
+    @contextmanager
+    def recording(self):
+        """
+        records the events processed in the block.
+        """
+        patches = [
+            (Events, "handle_event", self._handle_event(Events.handle_event)),
+            (Events, "find_new_event", self._find_new_event(Events.find_new_event)),
+            (Events, "add_event", self._add_event(Events.add_event)),
+            (LivingSegments, "remove", self._remove(LivingSegments.remove)),
+            (LivingSegments, "_attach", self._attach(LivingSegments._attach)),
+            (events_module, "add_crossings", self._add_crossings(events_module.add_crossings)),
+        ]
+        with open(self.filename, "wb") as log, open(self.index_filename, "wb") as index, \
+                patched(patches):
+            self.log, self.index, self.count = log, index, 0
+            yield self
+
+    def _write(self, event, snapshot):
+        """
+        appends the current record to the log.
+        """
+        operations, tests, crossing = self.record
+        self.index.write(struct.pack("<q", self.log.tell()))
+        self.log.write(HEADER.pack(event.type, *event.key.coordinates, len(snapshot),
+                                   len(operations), len(tests), len(crossing)))
+        self.log.write(array("q", snapshot).tobytes())
+        for operation in operations:
+            self.log.write(OPERATION.pack(*operation))
+        for test in tests:
+            self.log.write(TEST.pack(*test))
+        self.log.write(array("q", crossing).tobytes())
+        self.count += 1
+
+    def _handle_event(self, handle_event):
+        """
+        records the event.
+        """
+        def recorded(events, event, living_segments, solution):
+            if living_segments is not self.living_segments:
+                self.living_segments, self.indices = living_segments, set()
+            for segment in events.begin_points.get(event.key, ()):
+                if segment.index in self.indices:
+                    raise ValueError("traced segments need distinct indices "
+                                     "(index {} is repeated)".format(segment.index))
+                self.indices.add(segment.index)
+            snapshot = []
+            if self.count % SNAPSHOT_STEP == 0:
+                snapshot = [segment.index for segment in living_segments]
+            self.record = ([], [], [])
+            try:
+                handle_event(events, event, living_segments, solution)
+            finally:
+                self._write(event, snapshot)
+                self.record = None
+        return recorded
+
+    def _find_new_event(self, find_new_event):
+        """
+        records the neighbours tests.
+        """
+        def recorded(events, left, right, point):
+            self.registered = False
+            swapped = find_new_event(events, left, right, point)
+            if self.record is not None and left is not None and right is not None:
+                result = ON_POINT if swapped is not None else BELOW if self.registered else NOTHING
+                self.record[1].append((left.index, right.index, result))
+            return swapped
+        return recorded
+
+    def _add_event(self, add_event):
+        """
+        notices the intersections events.
+        """
+        def recorded(events, event_type, point):
+            if event_type == INTERSECTION:
+                self.registered = True
+            return add_event(events, event_type, point)
+        return recorded
+
+    def _remove(self, remove):
+        """
+        records the removals of living segments.
+        """
+        def recorded(living_segments, segment):
+            if self.record is not None and segment.living_node is not None:
+                self.record[0].append((REMOVE, segment.index, -1))
+            remove(living_segments, segment)
+        return recorded
+
+    def _attach(self, attach):
+        """
+        records the insertions of living segments.
+        """
+        def recorded(living_segments, segment, previous, following):
+            if self.record is not None:
+                self.record[0].append(
+                    (INSERT, segment.index, -1 if following is None else following.segment.index))
+            return attach(living_segments, segment, previous, following)
+        return recorded
+
+    def _add_crossings(self, add_crossings):
+        """
+        records the segments crossing on the point.
+        """
+        def recorded(point, crossing, solution):
+            if self.record is not None:
+                self.record[2].extend(segment.index for segment in crossing)
+            add_crossings(point, crossing, solution)
+        return recorded
+
+class TraceReader:
+    """
+    reads a trace written by a TraceRecorder.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.offsets = array("q")
+        with open(filename + ".index", "rb") as index:
+            self.offsets.frombytes(index.read())
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def event(self, number):
+        """
+        returns the event of given number: a dictionary with its type,
+        point, operations on the living segments (type, segment, following
+        segment), neighbours tests (left, right, result) and crossing
+        segments.
+        """
+        with open(self.filename, "rb") as log:
+            return self._read(log, number)[0]
+
+    def living(self, number):
+        """
+        returns the living segments (in order) just before processing the
+        event of given number (len(self) for the end of the sweep).
+        """
+        if not len(self):
+            return []
+        start = number - number % SNAPSHOT_STEP
+        with open(self.filename, "rb") as log:
+            if start == len(self):
+                start -= SNAPSHOT_STEP
+            event, living = self._read(log, start)
+            for current in range(start, number):
+                if current != start:
+                    event = self._read(log, current)[0]
+                for operation, segment, following in event["operations"]:
+                    if operation == REMOVE:
+                        living.remove(segment)
+                    elif following == -1:
+                        living.append(segment)
+                    else:
+                        living.insert(living.index(following), segment)
+        return living
+
+    def _read(self, log, number):
+        """
+        reads the event of given number and its snapshot.
+        """
+        log.seek(self.offsets[number])
+        event_type, x, y, snapshot_size, operations, tests, crossing = \
+            HEADER.unpack(log.read(HEADER.size))
+        snapshot = array("q", log.read(8 * snapshot_size)).tolist()
+        event = {
+            "number": number,
+            "type": event_type,
+            "point": (x, y),
+            "operations": [OPERATION.unpack(log.read(OPERATION.size))
+                           for _ in range(operations)],
+            "tests": [TEST.unpack(log.read(TEST.size)) for _ in range(tests)],
+            "crossing": array("q", log.read(8 * crossing)).tolist(),
+        }
+        return event, snapshot
@@ -0,0 +1,116 @@
+"""
+checks the engines against each other on the .bo files of this directory
+and on random segments, and some regressions of the sweep.
+"""
+import glob
+import os
+import random
+import pytest
+from geo.point import Point
+from geo.segment import Segment
+from geo.coordinates_hash import PRECISION, hash_array_test
+from geo.bo_file import load_segments
+from geo.tycat import write_svg
+from bo import ENGINES, intersect, adjusted_segments, bentley_ottmann
+from events import rounded_intersection_test
+from solution import Solution
+from slabs import parallel_bentley_ottmann
+from arrangement import build_arrangement
+from sweep_trace import TraceRecorder
+
+FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.bo")))
+
+# engines compute the same intersections with different roundings, and the
+# points are then adjusted in different orders
+TOLERANCE = 2 * 10**-PRECISION
+
+def segments_points(solution):
+    """
+    returns the intersection points of each segment of the solution.
+    """
+    return [[point.coordinates for point in solution.points(segment)]
+            for segment in solution.segments()]
+
+def missing_points(expected, found):
+    """
+    returns the expected points with no found point close to them.
+    """
+    return [point for point in expected
+            if not any(abs(point[0] - other[0]) <= TOLERANCE and
+                       abs(point[1] - other[1]) <= TOLERANCE for other in found)]
+
+def random_segments(seed, count=150):
+    """
+    returns count random segments in the unit square.
+    """
+    generator = random.Random(seed)
+    return [tuple(generator.random() for _ in range(4)) for _ in range(count)]
+
+@pytest.mark.parametrize("exact", [False, True])
+@pytest.mark.parametrize("filename", FILES, ids=os.path.basename)
+def test_engines_agree_on_files(filename, exact):
+    _, segments = load_segments(filename)
+    reference = segments_points(intersect(segments, engine="brute", exact=exact))
+    for engine in ENGINES:
+        points = segments_points(intersect(segments, engine=engine, exact=exact))
+        for expected, found in zip(reference, points):
+            assert len(found) == len(expected), engine
+            assert not missing_points(expected, found), engine
+
+@pytest.mark.parametrize("exact", [False, True])
+@pytest.mark.parametrize("seed", range(10))
+def test_sweep_loses_no_crossing(seed, exact):
+    segments = random_segments(seed)
+    reference = segments_points(intersect(segments, engine="brute", exact=exact))
+    points = segments_points(intersect(segments, exact=exact))
+    for expected, found in zip(reference, points):
+        assert not missing_points(expected, found)
+
+def test_rounded_intersection():
+    rounded_intersection_test()
+
+def test_hash_array():
+    hash_array_test()
+
+def test_slabs_without_segments():
+    with adjusted_segments([]) as segments:
+        solution = parallel_bentley_ottmann(segments, Solution(segments), workers=4)
+    assert solution.intersections_count() == 0
+
+def test_arrangement_of_overlapping_segments():
+    solution = intersect([(0, 0, 2, 0), (1, 0, 3, 0), (1.5, -1, 1.5, 1)])
+    arrangement = build_arrangement(solution)
+    assert len(arrangement) == 2 * 6
+    assert len(arrangement.half_edges(0)) == 3
+    assert len(arrangement.half_edges(1)) == 3
+
+def test_trace_needs_distinct_indices(tmp_path):
+    recorder = TraceRecorder(str(tmp_path / "sweep.trace"))
+    with adjusted_segments([Segment([Point([0, 0]), Point([1, 1])]),
+                            Segment([Point([0, 1]), Point([1, 0])])]) as segments:
+        with pytest.raises(ValueError, match="distinct indices"), recorder.recording():
+            bentley_ottmann(segments, Solution(segments))
+
+def test_touching_endpoints_left_out():
+    polyline = [(0, 0, 1, 1), (1, 1, 2, 0), (2, 0, 3, 1)]
+    assert intersect(polyline).intersections_count() == 2
+    assert intersect(polyline, touching=False).intersections_count() == 0
+    with pytest.raises(ValueError):
+        intersect(polyline, engine="brute", touching=False)
+
+def test_svg_of_generators(tmp_path):
+    generator = random.Random(0)
+    segments = [Segment([Point([generator.random(), generator.random()]),
+                         Point([generator.random(), generator.random()])])
+                for _ in range(100)]
+    points = [Point([generator.random(), generator.random()]) for _ in range(100)]
+    contents = []
+    for once in (False, True):
+        filename = str(tmp_path / "{}.svg".format(once))
+        if once:
+            write_svg(filename, [iter(segments), iter(points)], decimate=True)
+        else:
+            write_svg(filename, [segments, points], decimate=True)
+        with open(filename) as svg_file:
+            contents.append(svg_file.read())
+    assert contents[0] == contents[1]